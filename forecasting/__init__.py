@@ -0,0 +1,44 @@
+# Demand Forecasting pipeline modules
+#
+# Names below resolve on first access, so `import forecasting` loads
+# nothing heavy; each submodule pulls in pandas/xgboost/sklearn only
+# when it is actually used.
+
+import importlib
+
+_EXPORTS = {
+    'load_and_preprocess': 'pipeline',
+    'feature_engineering': 'pipeline',
+    'advanced_feature_engineering': 'pipeline',
+    'train_model': 'pipeline',
+    'hyperparameter_tuning': 'pipeline',
+    'train_model_advanced': 'pipeline',
+    'load_sales': 'ingest',
+    'grouped_feature_engineering': 'features',
+    'calendar_table': 'calendar_features',
+    'join_calendar': 'calendar_features',
+    'save_artifact': 'artifacts',
+    'load_artifact': 'artifacts',
+    'FeatureMatrix': 'matrix_store',
+    'write_matrix': 'matrix_store',
+    'predict_matrix': 'matrix_store',
+    'backtest': 'backtest',
+    'AccuracyReport': 'evaluation',
+    'accuracy_report': 'evaluation',
+    'Forecaster': 'forecast',
+    'OnlineFeatures': 'online',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'{__name__}.{_EXPORTS[name]}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,148 @@
+# Versioned model artifact bundles with fast, lazy loading
+
+import json
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import xgboost as xgb
+
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+BOOSTER = 'booster.ubj'
+SCALER = 'scaler.npy'
+
+
+## Scaler and Booster Wrappers
+
+class ScalerParams:
+    """StandardScaler transform from its saved mean/scale rows.
+
+    Inputs are first rounded to ``input_dtype``, the precision the training
+    features had (float32 for models trained from a matrix_store), so split
+    thresholds see exactly the values they were learned on.
+    """
+
+    def __init__(self, params, input_dtype='float64'):
+        self.mean = params[0]
+        self.scale = params[1]
+        self.input_dtype = np.dtype(input_dtype)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=self.input_dtype)
+        return (X.astype(np.float64, copy=False) - self.mean) / self.scale
+
+
+class BoosterModel:
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict(self, X):
+        return self.booster.inplace_predict(X)
+
+
+## Save
+
+def _scaler_params(scaler, n_features):
+    params = np.zeros((2, n_features))
+    params[1] = 1.0
+    if scaler is not None:
+        if getattr(scaler, 'mean_', None) is not None:
+            params[0] = scaler.mean_
+        if getattr(scaler, 'scale_', None) is not None:
+            params[1] = scaler.scale_
+    return params
+
+
+def save_artifact(path, model, scaler, feature_names, feature_params=None, metrics=None,
+                  input_dtype='float64'):
+    """Write booster (UBJSON), scaler parameters and manifest as one bundle directory."""
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    os.makedirs(tmp_path)
+    booster.save_model(os.path.join(tmp_path, BOOSTER))
+    np.save(os.path.join(tmp_path, SCALER), _scaler_params(scaler, len(feature_names)))
+    manifest = {'format_version': FORMAT_VERSION,
+                'xgboost_version': xgb.__version__,
+                'feature_names': list(feature_names),
+                'input_dtype': str(np.dtype(input_dtype)),
+                'feature_params': feature_params or {},
+                'metrics': metrics or {}}
+    with open(os.path.join(tmp_path, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+
+## Load
+
+class ModelArtifact:
+    def __init__(self, manifest, booster, scaler_params):
+        self.manifest = manifest
+        self.feature_names = manifest['feature_names']
+        self.feature_params = manifest['feature_params']
+        self.metrics = manifest.get('metrics', {})
+        self.model = BoosterModel(booster)
+        self.scaler = ScalerParams(scaler_params, manifest.get('input_dtype', 'float64'))
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(X))
+
+
+def load_artifact(path):
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format_version')} in {path}")
+    # XGBoost parses the file itself; the booster is rebuilt in its own memory either way
+    booster = xgb.Booster()
+    booster.load_model(os.path.join(path, BOOSTER))
+    scaler_params = np.load(os.path.join(path, SCALER), mmap_mode='r')
+    return ModelArtifact(manifest, booster, scaler_params)
+
+
+## Per-segment Registry
+
+class ArtifactRegistry:
+    """Loads per-segment bundles under ``root`` on first use, keeping the most recent in memory."""
+
+    def __init__(self, root, max_loaded=1024):
+        self.root = root
+        self.max_loaded = max_loaded
+        self.loaded = OrderedDict()
+
+    def path(self, segment):
+        return os.path.join(self.root, str(segment))
+
+    def save(self, segment, model, scaler, feature_names, feature_params=None, metrics=None,
+             input_dtype='float64'):
+        os.makedirs(self.root, exist_ok=True)
+        save_artifact(self.path(segment), model, scaler, feature_names, feature_params, metrics,
+                      input_dtype)
+        self.loaded.pop(str(segment), None)
+
+    def segments(self):
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, name, MANIFEST)))
+
+    def get(self, segment):
+        key = str(segment)
+        if key in self.loaded:
+            self.loaded.move_to_end(key)
+            return self.loaded[key]
+        artifact = load_artifact(self.path(key))
+        self.loaded[key] = artifact
+        if len(self.loaded) > self.max_loaded:
+            self.loaded.popitem(last=False)
+        return artifact
+
+
+# Example usage
+# save_artifact('models/demand', model, scaler, list(X.columns),
+#               {'target_col': 'demand', 'lags': 3, 'rolling_window': 3})
+# artifact = load_artifact('models/demand')
+# y_pred = artifact.predict(X_new)
@@ -0,0 +1,166 @@
+# Rolling-origin backtesting over a shared feature matrix
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from forecasting.features import series_layout
+from forecasting.instrument import traced
+from forecasting.tuning import thread_budget
+
+
+def default_model(n_jobs):
+    from xgboost import XGBRegressor
+    return XGBRegressor(objective='reg:squarederror',
+                        learning_rate=0.1,
+                        n_estimators=100,
+                        max_depth=5,
+                        subsample=0.8,
+                        colsample_bytree=0.8,
+                        random_state=42,
+                        n_jobs=n_jobs)
+
+
+## Shared Matrix
+
+def date_major_matrix(forecaster, df):
+    """Forecaster features ordered by (date, series), so every fold is a contiguous slice.
+
+    Row t only sees values up to t-1. Returns the series-major target values
+    and layout too, which the per-origin forecast state is read from.
+    """
+    df, codes, _, starts, lengths = series_layout(df, forecaster.series_col, forecaster.date_col)
+    X, values, _, _ = forecaster.training_matrix(df)
+    dates = df[forecaster.date_col].to_numpy()
+    order = np.lexsort((codes, dates))
+    series_ids = df[forecaster.series_col].to_numpy()[starts]
+    return X[order], values[order], codes[order], dates[order], series_ids, values, starts
+
+
+def time_split(dates, test_size=0.2):
+    """Boolean train mask holding out the most recent ``test_size`` of distinct dates."""
+    unique = np.unique(dates)
+    cutoff = unique[max(1, int(round(len(unique) * (1 - test_size)))) - 1]
+    return dates <= cutoff
+
+
+def rolling_origins(dates, n_origins=52, horizon=7, step=7, window=None):
+    """(train_start, origin, test_end) row bounds on date-sorted rows, oldest first."""
+    unique = np.unique(dates)
+    folds = []
+    for k in range(n_origins):
+        origin = len(unique) - horizon - k * step
+        if origin <= 0:
+            break
+        start = 0 if window is None else max(0, origin - window)
+        folds.append((int(np.searchsorted(dates, unique[start], 'left')),
+                      int(np.searchsorted(dates, unique[origin], 'left')),
+                      int(np.searchsorted(dates, unique[origin + horizon - 1], 'right'))))
+    return folds[::-1]
+
+
+## Metrics
+
+def error_sums(y, pred, codes, n_series):
+    err = pred - y
+    return np.stack([np.bincount(codes, np.abs(err), n_series),
+                     np.bincount(codes, err * err, n_series),
+                     np.bincount(codes, np.abs(y), n_series),
+                     np.bincount(codes, minlength=n_series).astype(np.float64)])
+
+
+def error_metrics(abs_err, sq_err, abs_actual, count):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {'wape': abs_err / abs_actual,
+                'mae': abs_err / count,
+                'rmse': np.sqrt(sq_err / count)}
+
+
+## Backtest
+
+@traced()
+def backtest(df, target_col, series_col, date_col, n_origins=52, horizon=7, step=7, window=None,
+             lags=3, rolling_window=3, ewm_alpha=0.3, model_factory=default_model, n_workers=None,
+             min_train_rows=100, report=None, report_dir=None):
+    """Rolling-origin backtest of ``horizon``-step forecasts; expanding window unless ``window`` is set.
+
+    ``df`` is the raw (series, date, target) panel. Each fold trains a
+    recursive Forecaster model on rows before the origin and rolls every
+    series forward from its state at the origin, so no test row sees an
+    actual from on or after the origin. Training rows slice one float32
+    matrix without copying and folds run on a thread pool (XGBoost releases
+    the GIL). Origins with fewer than ``min_train_rows`` complete training
+    rows before them are skipped, so ``n_origins`` is clamped to the
+    history there is. Returns (fold_metrics, series_metrics).
+    With an evaluation.AccuracyReport as ``report``, each fold's per-series
+    and per-level report is written to ``report_dir``/fold-NNN.parquet.
+    """
+    from forecasting.forecast import Forecaster
+
+    forecaster = Forecaster(target_col, series_col, date_col, horizon=horizon, lags=lags,
+                            rolling_window=rolling_window, ewm_alpha=ewm_alpha)
+    X, y, codes, dates, series_ids, values, starts = date_major_matrix(forecaster, df)
+    n_series = len(series_ids)
+    folds = rolling_origins(dates, n_origins, horizon, step, window)
+    unique = np.unique(dates)
+    step_of = np.searchsorted(unique, dates)  # date index of every row
+    # training rows need every feature and the target; dropping the rest keeps folds contiguous
+    complete = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+    X_fit, y_fit, fit_dates = X[complete], y[complete], dates[complete]
+    # rows of X_fit before each origin; too short a history gives no usable model
+    fit_bounds = [np.searchsorted(fit_dates, [dates[start], dates[origin]]) for start, origin, _ in folds]
+    folds = [f for f, (lo, hi) in zip(folds, fit_bounds) if hi - lo >= min_train_rows]
+    if not folds:
+        raise ValueError(f'no origin has {min_train_rows} complete training rows before it; '
+                         'lower n_origins or min_train_rows')
+    n_workers = min(thread_budget(n_workers)[0], max(len(folds), 1))
+    n_workers, n_jobs = thread_budget(n_workers)
+
+    if report is not None:
+        from forecasting.evaluation import write_report
+        os.makedirs(report_dir, exist_ok=True)
+
+    def run_fold(k, bounds):
+        start, origin, end = bounds
+        lo, hi = np.searchsorted(fit_dates, [dates[start], dates[origin]])
+        model = model_factory(n_jobs)
+        model.fit(X_fit[lo:hi], y_fit[lo:hi])
+        # every series' history before the origin, then `horizon` recursive steps
+        n_before = np.bincount(codes[:origin], minlength=n_series)
+        state, num, den = forecaster.state_arrays(values, starts, n_before)
+        forecasts = forecaster.forecast_array(state, num, den, models=[model])
+        test_codes = codes[origin:end]
+        pred = forecasts[test_codes, step_of[origin:end] - step_of[origin]]
+        actual = y[origin:end]
+        keep = (n_before[test_codes] > 0) & ~np.isnan(actual)
+        if report is not None:
+            fold_report = report.score(series_ids[test_codes[keep]], dates[origin:end][keep],
+                                       actual[keep], pred[keep])
+            write_report(fold_report, os.path.join(report_dir, f'fold-{k:03d}.parquet'))
+        return hi - lo, int(keep.sum()), error_sums(actual[keep], pred[keep], test_codes[keep], n_series)
+
+    with ThreadPoolExecutor(n_workers) as pool:
+        results = list(pool.map(run_fold, range(len(folds)), folds))
+    sums = [s for _, _, s in results]
+
+    fold_rows = []
+    for (start, origin, end), (train_rows, test_rows, s) in zip(folds, results):
+        totals = s.sum(axis=1)
+        fold_rows.append({'origin': dates[origin], 'train_rows': train_rows, 'test_rows': test_rows,
+                          **{k: float(v) for k, v in error_metrics(*totals).items()}})
+    fold_metrics = pd.DataFrame(fold_rows)
+
+    totals = np.sum(sums, axis=0) if sums else np.zeros((4, n_series))
+    series_metrics = pd.DataFrame({series_col: series_ids, 'test_rows': totals[3].astype(np.int64),
+                                   **error_metrics(*totals)})
+    series_metrics = series_metrics[series_metrics['test_rows'] > 0].reset_index(drop=True)
+    return fold_metrics, series_metrics
+
+
+# Example usage
+# fold_metrics, series_metrics = backtest(df, 'demand', 'sku', 'date', n_origins=52, horizon=7)
+# backtest(df, 'demand', 'sku', 'date', min_train_rows=1000)  # skip origins with too little history
+# report = AccuracyReport(df, 'demand', 'sku', 'date', levels=[['category'], []], season=7)
+# backtest(df, 'demand', 'sku', 'date', report=report, report_dir='reports')  # per-fold accuracy files
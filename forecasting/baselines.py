@@ -0,0 +1,125 @@
+# Vectorized statistical baselines over a (series x time) matrix
+
+import numpy as np
+import pandas as pd
+
+from forecasting.backtest import error_metrics, error_sums
+from forecasting.instrument import traced
+
+
+## Panel Matrix
+
+def panel_matrix(df, target_col, series_col, date_col):
+    """Pivot a long panel to (Y, series_ids, dates); missing cells are NaN."""
+    series_codes, series_ids = pd.factorize(df[series_col], sort=True)
+    date_codes, dates = pd.factorize(df[date_col], sort=True)
+    Y = np.full((len(series_ids), len(dates)), np.nan)
+    Y[series_codes, date_codes] = df[target_col].to_numpy(dtype=np.float64)
+    return Y, series_ids, dates
+
+
+## Baselines
+# Each takes the history Y (series x time) and returns (series x horizon) forecasts.
+
+def seasonal_naive(Y, horizon, season=7):
+    # no forecast until a full season has been seen
+    if Y.shape[1] < season:
+        return np.full((len(Y), horizon), np.nan)
+    last_season = Y[:, -season:]
+    return last_season[:, np.arange(horizon) % season]
+
+
+def moving_average(Y, horizon, window=7):
+    with np.errstate(invalid='ignore'):
+        level = np.nanmean(Y[:, -window:], axis=1) if Y.shape[1] else np.full(len(Y), np.nan)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def simple_exp_smoothing(Y, horizon, alpha=0.3):
+    level = np.full(len(Y), np.nan)
+    for t in range(Y.shape[1]):
+        y = Y[:, t]
+        seen = ~np.isnan(y)
+        start = seen & np.isnan(level)
+        level[start] = y[start]
+        update = seen & ~start
+        level[update] += alpha * (y[update] - level[update])
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def croston(Y, horizon, alpha=0.1, variant='sba'):
+    """Croston's method for intermittent demand; ``variant='sba'`` applies the Syntetos-Boylan correction."""
+    size = np.full(len(Y), np.nan)      # smoothed non-zero demand size
+    interval = np.full(len(Y), np.nan)  # smoothed periods between demands
+    since = np.ones(len(Y))
+    for t in range(Y.shape[1]):
+        y = Y[:, t]
+        demand = y > 0
+        first = demand & np.isnan(size)
+        size[first] = y[first]
+        interval[first] = since[first]
+        later = demand & ~first
+        size[later] += alpha * (y[later] - size[later])
+        interval[later] += alpha * (since[later] - interval[later])
+        since = np.where(demand, 1.0, since + 1.0)
+    rate = size / interval
+    if variant == 'sba':
+        rate *= 1 - alpha / 2
+    # series that never sold forecast zero once they have any observation
+    rate[np.isnan(rate) & ~np.isnan(Y).all(axis=1)] = 0.0
+    return np.repeat(rate[:, None], horizon, axis=1)
+
+
+BASELINES = {'seasonal_naive': seasonal_naive,
+             'moving_average': moving_average,
+             'ses': simple_exp_smoothing,
+             'croston': croston}
+
+
+## Backtest
+
+@traced()
+def backtest_baselines(Y, series_ids, dates, series_col='series', methods=None, n_origins=52,
+                       horizon=7, step=7, params=None):
+    """Rolling-origin backtest of each baseline with the same metrics as backtest().
+
+    Returns (fold_metrics, series_metrics) with a ``method`` column. Cells
+    with a missing actual or forecast are left out of the sums, including
+    origins with less history than a method needs.
+    """
+    methods = list(methods or BASELINES)
+    params = params or {}
+    n_series, n_dates = Y.shape
+    origins = [n_dates - horizon - k * step for k in range(n_origins)]
+    origins = [o for o in origins if o > 0][::-1]
+    codes = np.repeat(np.arange(n_series), horizon)
+    fold_rows = []
+    series_frames = []
+    for method in methods:
+        totals = np.zeros((4, n_series))
+        for origin in origins:
+            forecast = BASELINES[method](Y[:, :origin], horizon, **params.get(method, {}))
+            actual = Y[:, origin:origin + horizon]
+            keep = ~(np.isnan(actual) | np.isnan(forecast)).ravel()
+            sums = error_sums(actual.ravel()[keep], forecast.ravel()[keep], codes[keep], n_series)
+            totals += sums
+            fold_rows.append({'method': method, 'origin': dates[origin],
+                              'test_rows': int(keep.sum()),
+                              **{k: float(v) for k, v in error_metrics(*sums.sum(axis=1)).items()}})
+        frame = pd.DataFrame({'method': method, series_col: series_ids,
+                              'test_rows': totals[3].astype(np.int64), **error_metrics(*totals)})
+        series_frames.append(frame[frame['test_rows'] > 0])
+    return pd.DataFrame(fold_rows), pd.concat(series_frames, ignore_index=True)
+
+
+def best_baseline(series_metrics, series_col='series', metric='wape'):
+    """Cheapest-to-run routing table: the best baseline per series by ``metric``."""
+    ranked = series_metrics.dropna(subset=[metric]).sort_values([series_col, metric], kind='stable')
+    return ranked.drop_duplicates(series_col).reset_index(drop=True)
+
+
+# Example usage
+# Y, series_ids, dates = panel_matrix(df, 'demand', 'sku', 'date')
+# forecast = croston(Y, horizon=28)
+# fold_metrics, series_metrics = backtest_baselines(Y, series_ids, dates, series_col='sku')
+# routing = best_baseline(series_metrics, series_col='sku')
@@ -0,0 +1,158 @@
+# Pipeline benchmark suite over synthetic demand panels
+#
+#   python -m forecasting.bench --series 100 1000 --length 365 --out bench.jsonl
+#   python -m forecasting.bench --series 1000 --compare bench.jsonl
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from forecasting.artifacts import load_artifact, save_artifact
+from forecasting.backtest import time_split
+from forecasting.features import describe_features
+from forecasting.instrument import rss_peak_mb
+from forecasting.pipeline import (advanced_feature_engineering, feature_engineering,
+                                  hyperparameter_tuning, load_and_preprocess, train_model)
+from forecasting.synthetic import demand_panel
+
+
+TARGET = 'demand'
+
+
+## Measurement
+
+def measure(stage, fn, *args, rows=None, trace_memory=False, **kwargs):
+    """Run fn once; return (result, record with wall/CPU time, or the traced memory peak).
+
+    Timings come from runs with tracemalloc off: tracing every allocation
+    slows pandas-heavy stages several times over. Printed output (the
+    training metrics) is swallowed so it does not break up the table.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        if trace_memory:
+            tracemalloc.start()
+        cpu = time.process_time()
+        wall = time.perf_counter()
+        result = fn(*args, **kwargs)
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        if trace_memory:
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    if trace_memory:
+        return result, {'stage': stage, 'traced_peak_mb': traced_peak / 1024 ** 2}
+    return result, {'stage': stage, 'seconds': wall, 'cpu_seconds': cpu, 'rows': rows,
+                    'rss_peak_mb': rss_peak_mb()}
+
+
+## Stages
+
+def run_pipeline(n_series, length, seasonality, intermittency, seed, workdir, trace_memory=False):
+    """The pipeline functions in order, each measured once."""
+    records = []
+
+    def stage(name, fn, *args, rows=None, **kwargs):
+        result, rec = measure(name, fn, *args, rows=rows, trace_memory=trace_memory, **kwargs)
+        records.append(rec)
+        return result
+
+    df = demand_panel(n_series, length, seasonality=seasonality, intermittency=intermittency, seed=seed)
+    csv_path = os.path.join(workdir, f'panel-{n_series}x{length}.csv')
+    df.to_csv(csv_path, index=False)
+
+    raw = stage('load_and_preprocess', load_and_preprocess, csv_path, 'series_id', 'date',
+                rows=len(df))
+    stage('feature_engineering', feature_engineering, raw.copy(), TARGET, series_col='series_id',
+          date_col='date', rows=len(raw))
+    features = stage('advanced_feature_engineering', advanced_feature_engineering, raw, TARGET,
+                     series_col='series_id', date_col='date', rows=len(raw))
+
+    features = features.drop(columns=['series_id'])
+    feature_names = [c for c in features.columns if c not in (TARGET, 'date')]
+    X = features[feature_names].to_numpy(dtype=np.float32)
+    y = features[TARGET].to_numpy(dtype=np.float32)
+    train = time_split(features['date'].to_numpy())
+    stage('hyperparameter_tuning', hyperparameter_tuning, X[train], y[train], rows=int(train.sum()))
+    model, scaler = stage('train_model', train_model, features, TARGET, headless=True, date_col='date',
+                          rows=len(features))
+    artifact_path = os.path.join(workdir, f'model-{n_series}x{length}')
+    save_artifact(artifact_path, model, scaler, feature_names,
+                  describe_features(TARGET, feature_names, rolling_window=3, ewm_alpha=0.3))
+    stage('predict', load_artifact(artifact_path).predict, X[~train], rows=int((~train).sum()))
+    return records
+
+
+def environment():
+    import pandas
+    import sklearn
+    import xgboost
+    return {'python': platform.python_version(), 'cpus': os.cpu_count(),
+            'numpy': np.__version__, 'pandas': pandas.__version__,
+            'sklearn': sklearn.__version__, 'xgboost': xgboost.__version__}
+
+
+## Regression Check
+
+def compare(records, baseline_path, tolerance):
+    """Stages slower than ``tolerance`` x the matching baseline run."""
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['n_series'], r['length']): r for r in map(json.loads, f)}
+    regressions = []
+    for r in records:
+        base = baseline.get((r['stage'], r['n_series'], r['length']))
+        if base and r['seconds'] > tolerance * base['seconds']:
+            regressions.append(r)
+            print(f"REGRESSION {r['stage']} {r['n_series']}x{r['length']}: "
+                  f"{base['seconds']:.3f}s -> {r['seconds']:.3f}s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the forecasting pipeline stages.')
+    parser.add_argument('--series', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--length', type=int, nargs='+', default=[365])
+    parser.add_argument('--seasonality', type=float, default=0.3)
+    parser.add_argument('--intermittency', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='bench_results.jsonl')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc pass')
+    args = parser.parse_args(argv)
+
+    env = environment()
+    records = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_series in args.series:
+            for length in args.length:
+                run = (n_series, length, args.seasonality, args.intermittency, args.seed, workdir)
+                timed = run_pipeline(*run)
+                # memory in a second pass, so tracemalloc never slows the timed one
+                traced = [{}] * len(timed) if args.no_memory else run_pipeline(*run, trace_memory=True)
+                for rec, mem in zip(timed, traced):
+                    rec.update(n_series=n_series, length=length, seasonality=args.seasonality,
+                               intermittency=args.intermittency, seed=args.seed,
+                               traced_peak_mb=mem.get('traced_peak_mb'), **env)
+                    traced_mb = '' if rec['traced_peak_mb'] is None else f"{rec['traced_peak_mb']:9.1f} MB traced"
+                    print(f"{rec['stage']:<30} {n_series:>7}x{length:<5} {rec['seconds']:8.3f}s "
+                          f"{rec['rss_peak_mb']:9.1f} MB RSS {traced_mb}".rstrip())
+                    records.append(rec)
+    with open(args.out, 'a') as f:
+        for rec in records:
+            f.write(json.dumps(rec) + '\n')
+    if args.compare and compare(records, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# Precomputed calendar, holiday and promotion feature tables
+#
+# One dense float32 block per region with a row for every day from
+# `origin`; joining a frame is an integer gather values[region, day - origin]
+# instead of a merge or a per-row apply.
+
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from forecasting.feature_store import definition_digest, frame_digest
+from forecasting.instrument import traced
+
+
+CALENDAR_COLUMNS = ['day_of_week', 'day_of_month', 'day_of_year', 'week_of_year', 'month',
+                    'quarter', 'is_weekend', 'is_month_start', 'is_month_end']
+HOLIDAY_COLUMNS = ['is_holiday', 'days_to_holiday', 'days_since_holiday']
+HOLIDAY_HORIZON = 30  # days_to/since are clipped here, also when no holiday is in range
+
+
+def day_numbers(dates):
+    """Days since 1970-01-01; int columns (as written by load_sales) pass through."""
+    dates = np.asarray(dates)
+    if np.issubdtype(dates.dtype, np.integer):
+        return dates.astype(np.int64)
+    return pd.to_datetime(dates).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+## Table
+
+class CalendarTable:
+    """Feature rows for days origin .. origin + n_days - 1, one block per region."""
+
+    def __init__(self, origin, columns, regions, values):
+        self.origin = int(origin)
+        self.columns = list(columns)
+        self.regions = pd.Index(regions)
+        self.values = values  # (n_regions, n_days, n_columns) float32
+
+    @property
+    def n_days(self):
+        return self.values.shape[1]
+
+    def offsets(self, dates):
+        offset = day_numbers(dates) - self.origin
+        outside = (offset < 0) | (offset >= self.n_days)
+        if outside.any():
+            bad = np.asarray(dates)[outside][0]
+            raise ValueError(f'{bad} is outside the calendar table; rebuild it with a wider range')
+        return offset
+
+    def region_codes(self, regions):
+        # Look up each distinct region once (categorical codes as they are)
+        if isinstance(getattr(regions, 'dtype', None), pd.CategoricalDtype):
+            codes, uniques = regions.cat.codes.to_numpy(), regions.cat.categories
+        else:
+            codes, uniques = pd.factorize(regions)
+        lookup = self.regions.get_indexer(uniques)
+        if (lookup < 0).any() or (codes < 0).any():
+            missing = [r for r, i in zip(uniques, lookup) if i < 0] or [None]
+            raise ValueError(f'regions not in the calendar table: {missing}')
+        return lookup[codes]
+
+    def lookup(self, date, region=None):
+        """One day's features as a dict, e.g. for OnlineFeatures.update(extra=...)."""
+        code = self.region_codes(np.array([region], dtype=object))[0] if region is not None else 0
+        row = self.values[code, self.offsets([date])[0]]
+        return dict(zip(self.columns, row.tolist()))
+
+
+## Build
+
+def holiday_dates(region, start, end):
+    """Public holidays of ``region`` (a country code) from the optional holidays package."""
+    try:
+        import holidays
+    except ImportError:
+        raise ImportError('pass holiday dates explicitly or install the holidays package') from None
+    years = range(pd.Timestamp(start).year, pd.Timestamp(end).year + 1)
+    return sorted(holidays.country_holidays(region, years=years))
+
+
+def _holiday_block(days, holiday_days):
+    block = np.full((len(days), len(HOLIDAY_COLUMNS)), HOLIDAY_HORIZON, dtype=np.float32)
+    block[:, 0] = 0
+    if len(holiday_days) == 0:
+        return block
+    holiday_days = np.unique(holiday_days)
+    block[:, 0] = np.isin(days, holiday_days)
+    nxt = np.searchsorted(holiday_days, days, side='left')
+    has_next = nxt < len(holiday_days)
+    block[has_next, 1] = holiday_days[nxt[has_next]] - days[has_next]
+    prev = np.searchsorted(holiday_days, days, side='right') - 1
+    has_prev = prev >= 0
+    block[has_prev, 2] = days[has_prev] - holiday_days[prev[has_prev]]
+    np.minimum(block[:, 1:], HOLIDAY_HORIZON, out=block[:, 1:])
+    return block
+
+
+def _promotion_block(days, promotions, date_col, region_col, region, promo_cols):
+    block = np.zeros((len(days), len(promo_cols)), dtype=np.float32)
+    if promotions is None or not promo_cols:
+        return block
+    if region_col is not None:
+        promotions = promotions[promotions[region_col] == region]
+    offset = day_numbers(promotions[date_col]) - days[0]
+    keep = (offset >= 0) & (offset < len(days))
+    block[offset[keep]] = promotions[promo_cols].to_numpy(dtype=np.float32)[keep]
+    return block
+
+
+@traced()
+def build_calendar(start, end, regions=(None,), holidays=None, promotions=None,
+                   date_col='date', region_col=None):
+    """Dense calendar/holiday/promotion table for every day in [start, end].
+
+    ``holidays`` maps region -> dates (or is one list of dates for all
+    regions); regions missing from it are looked up with holiday_dates.
+    ``promotions`` is a frame of ``date_col`` (and ``region_col``) plus
+    numeric promotion columns, which become ``promo_<name>``.
+    """
+    dates = pd.date_range(start, end, freq='D')
+    days = day_numbers(dates)
+    calendar = np.column_stack([
+        dates.dayofweek, dates.day, dates.dayofyear, dates.isocalendar().week.to_numpy(),
+        dates.month, dates.quarter, dates.dayofweek >= 5, dates.is_month_start, dates.is_month_end,
+    ]).astype(np.float32)
+
+    promo_cols = []
+    if promotions is not None:
+        skip = {date_col, region_col}
+        promo_cols = [c for c in promotions.columns if c not in skip]
+    columns = CALENDAR_COLUMNS + HOLIDAY_COLUMNS + [f'promo_{c}' for c in promo_cols]
+
+    values = np.empty((len(regions), len(days), len(columns)), dtype=np.float32)
+    for r, region in enumerate(regions):
+        if isinstance(holidays, dict) and region in holidays:
+            region_holidays = holidays[region]
+        elif holidays is not None and not isinstance(holidays, dict):
+            region_holidays = holidays
+        elif region is not None:
+            region_holidays = holiday_dates(region, start, end)
+        else:
+            region_holidays = []
+        holiday_days = day_numbers(list(region_holidays)) if len(region_holidays) else np.array([], dtype=np.int64)
+        values[r] = np.hstack([calendar, _holiday_block(days, holiday_days),
+                               _promotion_block(days, promotions, date_col, region_col, region, promo_cols)])
+    return CalendarTable(days[0], columns, regions, values)
+
+
+## Disk Cache
+
+def calendar_key(start, end, regions, holidays, promotions, date_col, region_col):
+    if isinstance(holidays, dict):
+        holidays = {str(k): sorted(map(str, v)) for k, v in holidays.items()}
+    elif holidays is not None:
+        holidays = sorted(map(str, holidays))
+    payload = json.dumps({'start': str(start), 'end': str(end), 'regions': [str(r) for r in regions],
+                          'holidays': holidays,
+                          'promotions': None if promotions is None else frame_digest(promotions),
+                          'date_col': date_col, 'region_col': region_col,
+                          'definition': definition_digest(build_calendar)}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def calendar_table(start, end, regions=(None,), holidays=None, promotions=None,
+                   date_col='date', region_col=None, cache_dir=None):
+    """build_calendar, stored under ``cache_dir`` and memory-mapped on later calls."""
+    if cache_dir is None:
+        return build_calendar(start, end, regions, holidays, promotions, date_col, region_col)
+    key = calendar_key(start, end, regions, holidays, promotions, date_col, region_col)
+    path = os.path.join(cache_dir, f'calendar-{key}')
+    try:
+        with open(f'{path}.json') as f:
+            meta = json.load(f)
+        values = np.load(f'{path}.npy', mmap_mode='r')
+        return CalendarTable(meta['origin'], meta['columns'], meta['regions'], values)
+    except FileNotFoundError:
+        pass
+    table = build_calendar(start, end, regions, holidays, promotions, date_col, region_col)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp, 'wb') as f:
+        np.save(f, table.values)
+    os.replace(tmp, f'{path}.npy')
+    with open(tmp, 'w') as f:
+        json.dump({'origin': table.origin, 'columns': table.columns,
+                   'regions': table.regions.tolist()}, f, default=str)
+    os.replace(tmp, f'{path}.json')
+    return table
+
+
+## Join
+
+@traced()
+def join_calendar(df, table, date_col, region_col=None, columns=None):
+    """Append the table's features to ``df`` by gathering rows at each date offset."""
+    columns = table.columns if columns is None else list(columns)
+    col_idx = [table.columns.index(c) for c in columns]
+    offset = table.offsets(df[date_col].to_numpy())
+    if region_col is not None:
+        offset = offset + table.region_codes(df[region_col]) * table.n_days
+    values = np.asarray(table.values).reshape(-1, len(table.columns))
+    block = values.take(offset, axis=0)
+    if columns != table.columns:
+        block = block[:, col_idx]
+    calendar_df = pd.DataFrame(block, columns=columns, index=df.index, copy=False)
+    return pd.concat([df, calendar_df], axis=1)
+
+
+# Example usage
+# table = calendar_table('2020-01-01', '2026-12-31', regions=['US', 'GB'], promotions=promo_df,
+#                        region_col='region', cache_dir='.cache/calendar')
+# df = join_calendar(df, table, 'date', region_col='region')
+# df = feature_engineering(df, 'demand', series_col='sku', date_col='date', calendar=table, region_col='region')
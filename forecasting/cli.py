@@ -0,0 +1,236 @@
+# Command-line entry point: python -m forecasting {ingest,features,train,predict,evaluate}
+#
+#   python -m forecasting ingest sales.csv --series-col sku --date-col date --out sales.parquet
+#   python -m forecasting features sales.parquet --target demand --series-col sku --date-col date \
+#       --out features.parquet
+#   python -m forecasting train features.parquet --target demand --drop sku --date-col date \
+#       --artifact models/demand
+#   python -m forecasting predict models/demand features.parquet --keep sku date --out predictions.csv
+#   python -m forecasting evaluate predictions.csv --history sales.parquet --target demand \
+#       --series-col sku --date-col date --levels category total --out accuracy.parquet
+#
+# Each subcommand imports only what it runs: ingest, features and evaluate never
+# load sklearn, xgboost or matplotlib, and predict loads xgboost but not matplotlib.
+
+import argparse
+import os
+import sys
+import time
+
+
+def _read_frame(path, columns=None):
+    import pandas as pd
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def _write_frame(df, path):
+    if path.endswith('.parquet'):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+## Subcommands
+
+def ingest(args):
+    from forecasting.pipeline import load_and_preprocess
+
+    df = load_and_preprocess(args.path, args.series_col, args.date_col, cache_dir=args.cache_dir,
+                             id_cols=args.id_cols)
+    _write_frame(df, args.out)
+    print(f'{len(df)} rows -> {args.out}')
+
+
+def _calendar(args, df):
+    # Whole years around the data, so the cached table is reused as days are appended
+    import pandas as pd
+    from forecasting.calendar_features import calendar_table, day_numbers
+
+    days = day_numbers(df[args.date_col].to_numpy())
+    start = pd.Timestamp(int(days.min()), unit='D').replace(month=1, day=1)
+    end = pd.Timestamp(int(days.max()), unit='D').replace(month=12, day=31) + pd.DateOffset(years=1)
+    regions = (None,) if args.region_col is None else tuple(pd.unique(df[args.region_col]).tolist())
+    holidays = None
+    if args.holidays is not None:
+        frame = _read_frame(args.holidays)
+        if args.region_col is not None and args.region_col in frame.columns:
+            holidays = {r: g[args.date_col].tolist() for r, g in frame.groupby(args.region_col)}
+        else:
+            holidays = frame[args.date_col].tolist()
+    promotions = _read_frame(args.promotions) if args.promotions is not None else None
+    return calendar_table(start.date(), end.date(), regions, holidays, promotions,
+                          date_col=args.date_col, region_col=args.region_col,
+                          cache_dir=args.calendar_dir)
+
+
+def features(args):
+    from forecasting.pipeline import advanced_feature_engineering, feature_engineering
+
+    df = _read_frame(args.path)
+    calendar = _calendar(args, df) if args.calendar else None
+    if args.advanced:
+        df = advanced_feature_engineering(df, args.target, lags=args.lags,
+                                          rolling_window=args.rolling_window,
+                                          poly_terms=None if args.no_poly else 'all',
+                                          series_col=args.series_col, date_col=args.date_col)
+        if calendar is not None:
+            from forecasting.calendar_features import join_calendar
+            df = join_calendar(df, calendar, args.date_col, args.region_col)
+    else:
+        df = feature_engineering(df, args.target, lags=args.lags, rolling_window=args.rolling_window,
+                                 series_col=args.series_col, date_col=args.date_col,
+                                 calendar=calendar, region_col=args.region_col)
+    _write_frame(df, args.out)
+    print(f'{len(df)} rows x {df.shape[1]} columns -> {args.out}')
+
+
+def train(args):
+    from forecasting.artifacts import save_artifact
+    from forecasting.features import describe_features
+    from forecasting.pipeline import train_model, train_model_advanced
+
+    if args.matrix_dir is not None:
+        # Stream the file into a memory-mapped store; the frame is never loaded whole
+        from forecasting.matrix_store import FeatureMatrix, write_matrix
+        source = args.path if args.path.endswith('.parquet') else _read_frame(args.path)
+        write_matrix(source, args.target, args.matrix_dir, drop=args.drop, date_col=args.date_col)
+        df = FeatureMatrix(args.matrix_dir, mode='r+')
+        feature_names, input_dtype = df.feature_names, df.X.dtype
+    else:
+        # the date column is kept for the split but is not a feature
+        df = _read_frame(args.path).drop(columns=[c for c in args.drop if c != args.date_col])
+        skip = {args.target, args.date_col}
+        feature_names, input_dtype = [c for c in df.columns if c not in skip], 'float64'
+    trainer = train_model_advanced if args.advanced else train_model
+    model, scaler = trainer(df, args.target, headless=True, plot_dir=args.plot_dir,
+                            date_col=None if args.matrix_dir is not None else args.date_col)
+    feature_params = describe_features(args.target, feature_names, args.rolling_window, args.ewm_alpha)
+    save_artifact(args.artifact, model, scaler, feature_names, feature_params, input_dtype=input_dtype)
+    if args.plot_dir is not None:
+        from forecasting.plotting import get_renderer
+        get_renderer(args.plot_dir).close()
+    print(f'artifact -> {args.artifact}')
+
+
+def predict(args):
+    from forecasting.artifacts import load_artifact
+
+    artifact = load_artifact(args.artifact)
+    if os.path.isdir(args.path):
+        # A feature store from `train --matrix-dir`: scored straight from the mapping
+        import pandas as pd
+        from forecasting.matrix_store import FeatureMatrix, predict_matrix
+        matrix = FeatureMatrix(args.path)
+        out = pd.DataFrame({'prediction': predict_matrix(artifact, matrix)})
+        if matrix.dates is not None:
+            out.insert(0, matrix.date_col, matrix.dates)  # stored rows are in date order
+        _write_frame(out, args.out)
+        print(f'{len(out)} predictions -> {args.out}')
+        return
+    df = _read_frame(args.path, columns=list(args.keep) + artifact.feature_names)
+    out = df[list(args.keep)].copy()
+    out['prediction'] = artifact.predict(df[artifact.feature_names].to_numpy())
+    _write_frame(out, args.out)
+    print(f'{len(out)} predictions -> {args.out}')
+
+
+def evaluate(args):
+    from forecasting.evaluation import AccuracyReport, worst_series, write_report
+
+    levels = [[] if level == 'total' else level.split(',') for level in args.levels]
+    history = _read_frame(args.history)
+    report = AccuracyReport(history, args.target, args.series_col, args.date_col, levels, args.season)
+    df = _read_frame(args.path)
+    result = report.score_frame(df, args.pred_col)
+    write_report(result, args.out)
+    print(worst_series(result, 'wape', n=args.worst).to_string(index=False))
+    print(f'{len(result)} report rows -> {args.out}')
+
+
+## Argument Parsing
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m forecasting',
+                                     description='Demand forecasting pipeline.')
+    parser.add_argument('--trace', help='write stage timings (JSON lines) to this file')
+    parser.add_argument('--timing', action='store_true', help='print import and run time')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ingest', help='read a sales CSV into a typed Parquet file')
+    p.add_argument('path')
+    p.add_argument('--out', required=True)
+    p.add_argument('--series-col')
+    p.add_argument('--date-col')
+    p.add_argument('--id-cols', nargs='*', default=(),
+                   help='id columns besides the series (text columns are detected anyway)')
+    p.add_argument('--cache-dir')
+    p.set_defaults(func=ingest)
+
+    p = sub.add_parser('features', help='add lag, rolling mean and EWM features')
+    p.add_argument('path')
+    p.add_argument('--out', required=True)
+    p.add_argument('--target', required=True)
+    p.add_argument('--series-col')
+    p.add_argument('--date-col')
+    p.add_argument('--lags', type=int, default=3)
+    p.add_argument('--rolling-window', type=int, default=3)
+    p.add_argument('--advanced', action='store_true', help='add EWM and polynomial lag terms')
+    p.add_argument('--no-poly', action='store_true', help='with --advanced, skip polynomial terms')
+    p.add_argument('--calendar', action='store_true', help='add calendar, holiday and promotion columns')
+    p.add_argument('--region-col', help='region of each row (holiday calendar and promotions)')
+    p.add_argument('--holidays', help='file of holiday dates (date column, optional region column)')
+    p.add_argument('--promotions', help='file of date (and region) plus numeric promotion columns')
+    p.add_argument('--calendar-dir', default='.cache/calendar')
+    p.set_defaults(func=features)
+
+    p = sub.add_parser('train', help='train on a feature file and save an artifact bundle')
+    p.add_argument('path')
+    p.add_argument('--target', required=True)
+    p.add_argument('--artifact', required=True)
+    p.add_argument('--drop', nargs='*', default=[], help='non-feature columns (ids, dates)')
+    p.add_argument('--date-col', help='hold out the most recent 20%% of these dates for testing')
+    p.add_argument('--advanced', action='store_true', help='tune hyperparameters first')
+    # recorded in the artifact so serving rebuilds the same rolling mean and EWM columns
+    p.add_argument('--rolling-window', type=int, default=3, help='rolling window the features used')
+    p.add_argument('--ewm-alpha', type=float, default=0.3, help='EWM smoothing the features used')
+    p.add_argument('--plot-dir')
+    p.add_argument('--matrix-dir', help='keep the features in a memory-mapped float32 store here')
+    p.set_defaults(func=train)
+
+    p = sub.add_parser('predict', help='score a feature file with a saved artifact')
+    p.add_argument('artifact')
+    p.add_argument('path', help='feature file, or a feature store directory')
+    p.add_argument('--out', required=True)
+    p.add_argument('--keep', nargs='*', default=[], help='columns copied to the output')
+    p.set_defaults(func=predict)
+
+    p = sub.add_parser('evaluate', help='per-series and per-level WAPE, MASE, bias and RMSE')
+    p.add_argument('path', help='file with series, date, actual and prediction columns')
+    p.add_argument('--history', required=True, help='training actuals (MASE scale, hierarchy columns)')
+    p.add_argument('--out', required=True)
+    p.add_argument('--target', required=True)
+    p.add_argument('--pred-col', default='prediction')
+    p.add_argument('--series-col', required=True)
+    p.add_argument('--date-col', required=True)
+    p.add_argument('--levels', nargs='*', default=['total'],
+                   help="aggregate levels as comma-separated columns, 'total' for the grand total")
+    p.add_argument('--season', type=int, default=1, help='seasonal lag of the MASE naive forecast')
+    p.add_argument('--worst', type=int, default=10, help='print this many worst series by WAPE')
+    p.set_defaults(func=evaluate)
+    return parser
+
+
+def main(argv=None):
+    start = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        from forecasting.instrument import TRACER, enable
+        enable()
+    args.func(args)
+    if args.trace:
+        TRACER.write_jsonl(args.trace)
+    if args.timing:
+        print(f'{args.command}: {time.perf_counter() - start:.3f}s', file=sys.stderr)
+    return 0
@@ -0,0 +1,184 @@
+# Per-series and per-hierarchy-level accuracy reports
+#
+# WAPE, MASE, bias and RMSE for every series and every aggregate node,
+# computed with bincount over integer codes: no Python loop over series.
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from forecasting.backtest import error_metrics, error_sums
+from forecasting.features import lag_values
+from forecasting.instrument import traced
+
+
+METRICS = ['wape', 'mase', 'bias', 'rmse', 'mae']
+DENSE_CELLS = 1 << 24  # (node, date) grids up to this size are summed with one bincount
+
+
+## Grouped Reductions
+
+def _codes(values, index):
+    # Look up each distinct value once (categorical codes as they are)
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    lookup = index.get_indexer(uniques)
+    if (lookup < 0).any():
+        # ids read back from CSV lose their dtype (category '7' becomes int 7); match them as text
+        as_text = pd.Index(index.astype(str))
+        if as_text.is_unique:
+            by_text = as_text.get_indexer(pd.Index(uniques).astype(str))
+            lookup = np.where(lookup < 0, by_text, lookup)
+    if (lookup < 0).any() or (codes < 0).any():
+        missing = [u for u, i in zip(uniques, lookup) if i < 0][:5] or [None]
+        raise ValueError(f'series not in the report history: {missing}')
+    return lookup[codes]
+
+
+def cell_sums(node, date, n_nodes, n_dates, *values):
+    """Sum ``values`` per (node, date) cell; cells come back sorted by node, then date."""
+    key = node.astype(np.int64) * n_dates + date
+    if n_nodes * n_dates <= DENSE_CELLS:
+        count = np.bincount(key, minlength=n_nodes * n_dates)
+        cells = np.flatnonzero(count)
+        sums = [np.bincount(key, v, n_nodes * n_dates)[cells] for v in values]
+    else:
+        cells, inverse = np.unique(key, return_inverse=True)
+        sums = [np.bincount(inverse, v, len(cells)) for v in values]
+    return cells // n_dates, cells % n_dates, sums
+
+
+def naive_scale(node, y, n_nodes, season=1):
+    """Mean |y_t - y_{t-season}| per node over cells sorted by (node, date); the MASE denominator."""
+    boundary = np.ones(len(node), dtype=bool)
+    boundary[1:] = node[1:] != node[:-1]
+    starts = np.flatnonzero(boundary)
+    pos = np.arange(len(node)) - np.repeat(starts, np.diff(np.append(starts, len(node))))
+    diff = np.abs(y - lag_values(y, pos, season))
+    seen = ~np.isnan(diff)
+    total = np.bincount(node[seen], diff[seen], n_nodes)
+    count = np.bincount(node[seen], minlength=n_nodes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+
+def node_metrics(y, pred, node, n_nodes, scale):
+    abs_err, sq_err, abs_actual, count = error_sums(y, pred, node, n_nodes)
+    signed = np.bincount(node, pred - y, n_nodes)
+    metrics = error_metrics(abs_err, sq_err, abs_actual, count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        metrics['mase'] = metrics['mae'] / scale
+        metrics['bias'] = signed / abs_actual  # > 0 over-forecast, share of actual volume
+    return count.astype(np.int64), metrics
+
+
+## Report
+
+class AccuracyReport:
+    """Series index, level membership and MASE scales, built once from the history.
+
+    ``levels`` are lists of hierarchy columns constant within a series,
+    e.g. [['category'], ['category', 'region'], []] ([] is the total).
+    score() is then a few gathers and bincounts per call, cheap enough to
+    run after every backtest fold.
+    """
+
+    def __init__(self, history, target_col, series_col, date_col, levels=(), season=1):
+        self.target_col = target_col
+        self.series_col = series_col
+        self.date_col = date_col
+        self.levels = [list(level) for level in levels]
+        self.season = season
+
+        codes, series_ids = pd.factorize(history[series_col])
+        self.series_ids = pd.Index(series_ids)
+        hier_cols = list(dict.fromkeys(c for level in self.levels for c in level))
+        first = np.unique(codes, return_index=True)[1]
+        self.keys = history[[series_col, *hier_cols]].iloc[first].reset_index(drop=True)
+
+        # node of every series at each level; the bottom level is the series itself
+        self.nodes = [('series', np.arange(len(self.series_ids)), self.keys)]
+        for level in self.levels:
+            if level:
+                grouped = self.keys.groupby(level, sort=True, observed=True)
+                node = grouped.ngroup().to_numpy()
+                node_keys = grouped.size().index.to_frame(index=False)
+            else:
+                node = np.zeros(len(self.keys), dtype=np.int64)
+                node_keys = pd.DataFrame(index=range(1))
+            self.nodes.append(('/'.join(level) or 'total', node, node_keys))
+
+        date_codes, dates = pd.factorize(history[date_col], sort=True)
+        y = history[target_col].to_numpy(dtype=np.float64)
+        self.scales = []
+        for _, node_of_series, node_keys in self.nodes:
+            node, _, (totals,) = cell_sums(node_of_series[codes], date_codes, len(node_keys),
+                                           len(dates), np.nan_to_num(y))
+            self.scales.append(naive_scale(node, totals, len(node_keys), season))
+
+    @traced(rows_arg=1)
+    def score(self, series, dates, actual, pred):
+        """Report frame: one row per series and per aggregate node that has test rows."""
+        codes = _codes(series, self.series_ids)
+        date_codes, unique_dates = pd.factorize(dates, sort=True)
+        actual = np.asarray(actual, dtype=np.float64)
+        pred = np.asarray(pred, dtype=np.float64)
+
+        frames = []
+        for (name, node_of_series, node_keys), scale in zip(self.nodes, self.scales):
+            if name == 'series':
+                node, y, p = codes, actual, pred
+            else:
+                # aggregate forecasts are scored as sums over the node on each date
+                node, _, (y, p) = cell_sums(node_of_series[codes], date_codes, len(node_keys),
+                                            len(unique_dates), actual, pred)
+            count, metrics = node_metrics(y, p, node, len(node_keys), scale)
+            keep = count > 0
+            frame = node_keys[keep].reset_index(drop=True)
+            frame.insert(0, 'level', name)
+            frame['n'] = count[keep]
+            for m in METRICS:
+                frame[m] = metrics[m][keep]
+            frames.append(frame)
+        report = pd.concat(frames, ignore_index=True)
+        # key columns are missing on other levels' rows; keep integer ids integer
+        for c in self.keys.columns:
+            if pd.api.types.is_integer_dtype(self.keys[c]):
+                report[c] = report[c].astype('Int64')
+        return report
+
+    def score_frame(self, df, pred_col):
+        return self.score(df[self.series_col], df[self.date_col], df[self.target_col], df[pred_col])
+
+
+@traced(rows_arg=0)
+def accuracy_report(df, pred_col, history, target_col, series_col, date_col, levels=(), season=1):
+    """One-off report; build an AccuracyReport once to score many folds."""
+    report = AccuracyReport(history, target_col, series_col, date_col, levels, season)
+    return report.score_frame(df, pred_col)
+
+
+## Output
+
+def write_report(report, path):
+    """Parquet with float32 metrics, dictionary-encoded keys and zstd compression."""
+    report = report.astype({m: np.float32 for m in METRICS})
+    report['level'] = report['level'].astype('category')
+    table = pa.Table.from_pandas(report, preserve_index=False)
+    pq.write_table(table, path, compression='zstd')
+
+
+def worst_series(report, metric='wape', n=20, min_rows=1):
+    """The long tail: series rows sorted worst first."""
+    rows = report[(report['level'] == 'series') & (report['n'] >= min_rows)]
+    return rows.sort_values(metric, ascending=False, key=np.abs).head(n)
+
+
+# Example usage
+# report = AccuracyReport(train_df, 'demand', 'sku', 'date', levels=[['category'], ['region'], []], season=7)
+# fold_report = report.score_frame(test_df, 'prediction')
+# write_report(fold_report, 'reports/fold-2024-06-01.parquet')
+# worst_series(fold_report, 'wape', n=50, min_rows=7)
@@ -0,0 +1,119 @@
+# Out-of-core training from on-disk columnar feature files
+
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xgboost as xgb
+
+from forecasting.global_model import GLOBAL_PARAMS
+from forecasting.instrument import traced
+from forecasting.matrix_store import chunked_scaler
+
+
+## Batches
+
+def batch_rows_for_budget(n_columns, memory_budget, copies=4):
+    """Rows per batch so ``copies`` float32 copies of a batch fit in ``memory_budget`` bytes."""
+    return max(1024, int(memory_budget // (n_columns * 4 * copies)))
+
+
+def _record_batches(path, columns, batch_rows):
+    if path.endswith('.parquet'):
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_rows, columns=columns)
+        return
+    # Arrow IPC file (e.g. a FeatureStore entry)
+    reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i).select(columns)
+        for offset in range(0, batch.num_rows, batch_rows):
+            yield batch.slice(offset, batch_rows)
+
+
+def iter_batches(paths, feature_cols, target_col, batch_rows):
+    """Yield (X float32, y float32) batches from Parquet or Arrow IPC files."""
+    columns = list(feature_cols) + [target_col]
+    for path in paths:
+        for batch in _record_batches(path, columns, batch_rows):
+            X = np.empty((batch.num_rows, len(feature_cols)), dtype=np.float32)
+            for j in range(len(feature_cols)):
+                X[:, j] = batch.column(j).to_numpy(zero_copy_only=False)
+            y = batch.column(len(feature_cols)).to_numpy(zero_copy_only=False).astype(np.float32)
+            yield X, y
+
+
+## Streaming Scaler
+
+def streaming_scaler(paths, feature_cols, target_col, batch_rows):
+    """StandardScaler fitted in one pass over the files."""
+    batches = (X for X, _ in iter_batches(paths, feature_cols, target_col, batch_rows))
+    return chunked_scaler(batches, len(feature_cols))
+
+
+## XGBoost Data Iterator
+
+class FeatureFileIter(xgb.DataIter):
+    """Feeds scaled batches to XGBoost one at a time; pages are cached under ``cache_prefix``."""
+
+    def __init__(self, paths, feature_cols, target_col, batch_rows, scaler, cache_prefix):
+        self.paths = paths
+        self.feature_cols = feature_cols
+        self.target_col = target_col
+        self.batch_rows = batch_rows
+        self.scaler = scaler
+        self.batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self.batches is None:
+            self.batches = iter_batches(self.paths, self.feature_cols, self.target_col, self.batch_rows)
+        try:
+            X, y = next(self.batches)
+        except StopIteration:
+            return False
+        X -= self.scaler.mean_.astype(np.float32)
+        X /= self.scaler.scale_.astype(np.float32)
+        input_data(data=X, label=y)
+        return True
+
+    def reset(self):
+        self.batches = None
+
+
+def external_dmatrix(data_iter, max_bin=256, ref=None):
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        return xgb.ExtMemQuantileDMatrix(data_iter, max_bin=max_bin, ref=ref)
+    return xgb.DMatrix(data_iter)
+
+
+## Training
+
+@traced()
+def train_external(paths, target_col, feature_cols, cache_dir, memory_budget=2 * 1024 ** 3,
+                   num_boost_round=100, max_bin=256, params=None, eval_paths=None):
+    """Train a hist booster on files larger than RAM.
+
+    Two streaming passes: one fits the scaler, one builds XGBoost's external
+    memory pages. Only one batch, sized from ``memory_budget``, is
+    materialized at a time. Returns (booster, scaler).
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    batch_rows = batch_rows_for_budget(len(feature_cols), memory_budget)
+    scaler = streaming_scaler(paths, feature_cols, target_col, batch_rows)
+    train_iter = FeatureFileIter(paths, feature_cols, target_col, batch_rows, scaler,
+                                 os.path.join(cache_dir, 'train'))
+    dtrain = external_dmatrix(train_iter, max_bin)
+    evals = []
+    if eval_paths:
+        eval_iter = FeatureFileIter(eval_paths, feature_cols, target_col, batch_rows, scaler,
+                                    os.path.join(cache_dir, 'eval'))
+        evals = [(external_dmatrix(eval_iter, max_bin, ref=dtrain), 'eval')]
+    booster = xgb.train({**GLOBAL_PARAMS, 'max_bin': max_bin, **(params or {})}, dtrain,
+                        num_boost_round=num_boost_round, evals=evals, verbose_eval=25)
+    return booster, scaler
+
+
+# Example usage
+# booster, scaler = train_external(['features/part-0.parquet', 'features/part-1.parquet'],
+#                                  'demand', feature_cols, '.cache/xgb', memory_budget=4 * 1024 ** 3)
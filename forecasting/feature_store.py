@@ -0,0 +1,154 @@
+# Content-addressed on-disk feature cache
+
+import hashlib
+import inspect
+import json
+import os
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+
+from forecasting.instrument import traced
+
+
+## Keys
+
+def frame_digest(df):
+    """Hash of a frame's values, index, column names and dtypes."""
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _package_callees(fn):
+    # Package functions and classes named in fn's code, including nested functions and lambdas
+    package = __name__.partition('.')[0]
+    if inspect.isclass(fn):
+        return [v for v in vars(fn).values() if inspect.isfunction(v)]
+    code = getattr(fn, '__code__', None)
+    if code is None:
+        return []
+    names, codes = set(), [code]
+    while codes:
+        c = codes.pop()
+        names.update(c.co_names)
+        codes.extend(k for k in c.co_consts if inspect.iscode(k))
+    found = []
+    for name in sorted(names):
+        obj = fn.__globals__.get(name)
+        if callable(obj) and getattr(obj, '__module__', '').partition('.')[0] == package:
+            found.append(obj)
+    return found
+
+
+def definition_digest(builder):
+    # Editing the feature function, or any package function it reaches
+    # (feature_engineering, the kernels, ...), invalidates its cached results
+    sources = {}
+    stack = [builder]
+    while stack:
+        fn = inspect.unwrap(stack.pop())
+        name = f'{getattr(fn, "__module__", "")}.{getattr(fn, "__qualname__", repr(fn))}'
+        if name in sources:
+            continue
+        try:
+            sources[name] = inspect.getsource(fn).encode()
+        except (OSError, TypeError):
+            sources[name] = getattr(getattr(fn, '__code__', None), 'co_code', b'')
+        stack.extend(_package_callees(fn))
+    h = hashlib.sha256()
+    for name in sorted(sources):
+        h.update(name.encode() + sources[name])
+    return h.hexdigest()
+
+
+def feature_key(df, builder, params):
+    payload = json.dumps({'data': frame_digest(df),
+                          'definition': definition_digest(builder),
+                          'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+## Store
+
+class FeatureStore:
+    """Arrow IPC files under ``root``, evicted least-recently-used past ``max_bytes``."""
+
+    def __init__(self, root, max_bytes=20 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, f'{key}.arrow')
+
+    def get(self, key, writable=True):
+        """The stored frame, or None.
+
+        ``writable=False`` returns float columns as read-only views onto the
+        mapped file, with no copy; the default copies them into ordinary
+        writable blocks, so a hit behaves like a freshly built frame.
+        """
+        path = self.path(key)
+        try:
+            source = pa.memory_map(path, 'r')
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # mark as recently used
+        table = pa.ipc.open_file(source).read_all()
+        if writable:
+            return table.to_pandas()
+        return table.to_pandas(split_blocks=True)
+
+    def put(self, key, df):
+        path = self.path(key)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith('.arrow'):
+                continue
+            st = os.stat(os.path.join(self.root, name))
+            entries.append((st.st_mtime_ns, st.st_size, name))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        # always keep the newest entry, even if it alone exceeds the budget
+        for _, size, name in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.root, name))
+            total -= size
+
+
+## Cached Feature Engineering
+
+@traced(rows_arg=2)
+def cached_features(store, builder, df, **params):
+    """Return builder(df, **params), reusing a stored result when inputs match.
+
+    The builder gets a copy, so ``df`` is left unchanged on a hit or a miss.
+    """
+    key = feature_key(df, builder, params)
+    features = store.get(key)
+    if features is None:
+        features = builder(df.copy(), **params)
+        store.put(key, features)
+    return features
+
+
+# Example usage
+# store = FeatureStore('.cache/features', max_bytes=50 * 1024 ** 3)
+# df = cached_features(store, advanced_feature_engineering, df,
+#                      target_col='demand', lags=3, rolling_window=3)
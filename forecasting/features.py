@@ -0,0 +1,159 @@
+# Grouped feature engine for multi-series demand panels
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from forecasting.instrument import traced
+
+
+## Series Layout
+
+def series_layout(df, series_col, date_col):
+    """Sort a long panel by series and date and return (df, codes, pos, starts, lengths)."""
+    df = df.sort_values([series_col, date_col], kind='stable', ignore_index=True)
+    codes, _ = pd.factorize(df[series_col], sort=False)
+    codes = codes.astype(np.int64)
+    n = len(codes)
+    boundary = np.ones(n, dtype=bool)
+    if n:
+        boundary[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(boundary)
+    lengths = np.diff(np.append(starts, n))
+    # position of every row inside its own series
+    pos = np.arange(n) - np.repeat(starts, lengths)
+    return df, codes, pos, starts, lengths
+
+
+def segment_positions(starts, counts):
+    """Flat positions start[i] + 0..counts[i]-1 of every segment, and the in-segment offsets."""
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets, offsets
+
+
+## Vectorized Kernels
+
+def lag_values(values, pos, lag):
+    out = np.full(len(values), np.nan)
+    keep = pos >= lag
+    out[keep] = values[np.flatnonzero(keep) - lag]
+    return out
+
+
+def rolling_mean_values(values, pos, window):
+    # Sum of shifted copies so the order of additions is fixed; the
+    # incremental path repeats the same additions and stays bit-identical.
+    total = values.astype(np.float64, copy=True)
+    for k in range(1, window):
+        total = total + lag_values(values, pos, k)
+    return total / window
+
+
+def ewm_values(values, starts, lengths, alpha, num=None, den=None):
+    """EWM per series; pass ``num``/``den`` to continue from a previous run.
+
+    Matches pandas ewm(alpha=alpha, adjust=True, ignore_na=False).mean().
+    ``num`` and ``den`` are updated in place to the state after the last row.
+    """
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    if num is None:
+        num = np.zeros(len(starts))
+    if den is None:
+        den = np.zeros(len(starts))
+    # Loops over time positions, each step vectorized across every series;
+    # longest series first, so the series still running at step p are a prefix
+    order = np.argsort(-lengths, kind='stable')
+    remaining = lengths[order]
+    for p in range(int(remaining[0]) if len(remaining) else 0):
+        active = order[:np.count_nonzero(remaining > p)]
+        idx = starts[active] + p
+        x = values[idx]
+        seen = ~np.isnan(x)
+        num[active] = num[active] * decay + np.where(seen, x, 0.0)
+        den[active] = den[active] * decay + seen
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[idx] = np.where(den[active] > 0, num[active] / den[active], np.nan)
+    return out
+
+
+## Feature Engineering across Series
+
+@traced()
+def grouped_feature_engineering(df, target_col, series_col, date_col, lags=3,
+                                rolling_window=3, ewm_alpha=None, dropna=True):
+    """Lag, rolling mean and EWM features for every series in one pass.
+
+    Returns a new frame sorted by (series_col, date_col); features never
+    cross a series boundary.
+    """
+    df, codes, pos, starts, lengths = series_layout(df, series_col, date_col)
+    values = df[target_col].to_numpy(dtype=np.float64)
+
+    features = {}
+    for lag in range(1, lags + 1):
+        features[f'{target_col}_lag_{lag}'] = lag_values(values, pos, lag)
+    features[f'{target_col}_rolling_mean'] = rolling_mean_values(values, pos, rolling_window)
+    if ewm_alpha is not None:
+        features[f'{target_col}_ewm'] = ewm_values(values, starts, lengths, ewm_alpha)
+
+    df = pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
+    if dropna:
+        df = df.dropna(subset=list(features)).reset_index(drop=True)
+    return df
+
+
+## Polynomial Expansion
+
+def degree2_terms(columns):
+    """Every square and pairwise product of ``columns``, in PolynomialFeatures order."""
+    return [(a, b) for i, a in enumerate(columns) for b in columns[i:]]
+
+
+def term_name(term):
+    a, b = term
+    return f'{a}^2' if a == b else f'{a} {b}'
+
+
+@traced()
+def expand_polynomial(df, terms, dtype=np.float32):
+    """Append only the requested product terms, computed into one preallocated block.
+
+    ``terms`` is a list of (column, column) pairs, e.g. from degree2_terms.
+    """
+    if not terms:
+        return df
+    block = np.empty((len(df), len(terms)), dtype=dtype, order='F')
+    sources = {c: df[c].to_numpy(dtype=dtype) for term in terms for c in term}
+    for j, (a, b) in enumerate(terms):
+        np.multiply(sources[a], sources[b], out=block[:, j])
+    poly_df = pd.DataFrame(block, columns=[term_name(t) for t in terms], index=df.index, copy=False)
+    return pd.concat([df, poly_df], axis=1)
+
+
+## Artifact Parameters
+
+def describe_features(target_col, feature_names, rolling_window=None, ewm_alpha=None):
+    """An artifact's feature_params: how to rebuild its derived columns from raw values.
+
+    ``lags`` is read off the lag column names; ``rolling_window`` and
+    ``ewm_alpha`` cannot be, so they are recorded as given when the model
+    uses those columns.
+    """
+    names = ' '.join(feature_names)
+    lags = [int(k) for k in re.findall(rf'(?<!\S){re.escape(target_col)}_lag_(\d+)', names)]
+    params = {'target_col': target_col, 'lags': max(lags, default=0)}
+    if rolling_window is not None and f'{target_col}_rolling_mean' in names:
+        params['rolling_window'] = rolling_window
+    if ewm_alpha is not None and f'{target_col}_ewm' in names:
+        params['ewm_alpha'] = ewm_alpha
+    return params
+
+
+# Example usage
+# df = grouped_feature_engineering(df, 'demand', series_col='sku', date_col='date',
+#                                  lags=3, rolling_window=3, ewm_alpha=0.3)
+# df = expand_polynomial(df, [('demand_lag_1', 'demand_lag_2'), ('demand_lag_1', 'demand_lag_1')])
+# params = describe_features('demand', feature_names, rolling_window=3, ewm_alpha=0.3)  # for save_artifact
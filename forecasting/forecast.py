@@ -0,0 +1,175 @@
+# Multi-horizon forecasting for every series at once
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from forecasting.backtest import default_model
+from forecasting.features import (ewm_values, lag_values, rolling_mean_values, segment_positions,
+                                  series_layout)
+from forecasting.instrument import traced
+from forecasting.tuning import thread_budget
+
+
+## Forecast Features
+# Row t only sees values up to t-1: lags, plus the rolling mean and EWM of
+# the previous row, so every feature is known when the forecast is made.
+
+def forecast_feature_names(target_col, lags, rolling_window, ewm_alpha):
+    names = [f'{target_col}_lag_{lag}' for lag in range(1, lags + 1)]
+    names.append(f'{target_col}_rolling_mean_lag_1')
+    if ewm_alpha is not None:
+        names.append(f'{target_col}_ewm_lag_1')
+    return names
+
+
+def lead_values(values, pos, lengths, lead):
+    out = np.full(len(values), np.nan)
+    keep = pos + lead < np.repeat(lengths, lengths)
+    out[keep] = values[np.flatnonzero(keep) + lead]
+    return out
+
+
+class Forecaster:
+    """H-step forecasts for a whole panel, recursive or direct.
+
+    ``mode='recursive'`` trains one one-step model and feeds predictions back
+    through a (series x depth) state array. ``mode='direct'`` trains one model
+    per horizon on the same feature matrix, in parallel.
+    """
+
+    def __init__(self, target_col, series_col, date_col, horizon=28, mode='recursive', lags=3,
+                 rolling_window=3, ewm_alpha=0.3, date_step=1, model_factory=default_model,
+                 n_workers=None):
+        if mode not in ('recursive', 'direct'):
+            raise ValueError(f"mode must be 'recursive' or 'direct', got {mode!r}")
+        self.target_col = target_col
+        self.series_col = series_col
+        self.date_col = date_col
+        self.horizon = horizon
+        self.mode = mode
+        self.lags = lags
+        self.rolling_window = rolling_window
+        self.ewm_alpha = ewm_alpha
+        self.date_step = date_step
+        self.model_factory = model_factory
+        self.n_workers = n_workers
+        self.depth = max(lags, rolling_window)
+        self.feature_names = forecast_feature_names(target_col, lags, rolling_window, ewm_alpha)
+        self.models = []
+
+    ## Training
+
+    def training_matrix(self, df):
+        df, _, pos, starts, lengths = series_layout(df, self.series_col, self.date_col)
+        values = df[self.target_col].to_numpy(dtype=np.float64)
+        columns = [lag_values(values, pos, lag) for lag in range(1, self.lags + 1)]
+        columns.append(lag_values(rolling_mean_values(values, pos, self.rolling_window), pos, 1))
+        if self.ewm_alpha is not None:
+            columns.append(lag_values(ewm_values(values, starts, lengths, self.ewm_alpha), pos, 1))
+        X = np.column_stack(columns).astype(np.float32)
+        return X, values, pos, lengths
+
+    @traced(rows_arg=1)
+    def fit(self, df):
+        X, values, pos, lengths = self.training_matrix(df)
+        complete = ~np.isnan(X).any(axis=1)
+        steps = [1] if self.mode == 'recursive' else range(1, self.horizon + 1)
+        n_workers, n_jobs = thread_budget(min(thread_budget(self.n_workers)[0], len(steps)))
+
+        def fit_step(step):
+            # features at row t describe history up to t-1; the step-ahead target is t+step-1
+            y = lead_values(values, pos, lengths, step - 1)
+            rows = complete & ~np.isnan(y)
+            model = self.model_factory(n_jobs)
+            model.fit(X[rows], y[rows])
+            return model
+
+        with ThreadPoolExecutor(n_workers) as pool:
+            self.models = list(pool.map(fit_step, steps))
+        return self
+
+    ## State
+
+    def initial_state(self, df):
+        """Last ``depth`` values and EWM accumulators per series, plus their last dates."""
+        df, _, _, starts, lengths = series_layout(df, self.series_col, self.date_col)
+        values = df[self.target_col].to_numpy(dtype=np.float64)
+        state, num, den = self.state_arrays(values, starts, lengths)
+        last = starts + lengths - 1
+        return state, num, den, df[self.series_col].to_numpy()[last], df[self.date_col].to_numpy()[last]
+
+    def state_arrays(self, values, starts, lengths):
+        """(state, num, den) after the first ``lengths`` values of each series in series-major ``values``."""
+        n_series = len(starts)
+        take = np.minimum(lengths, self.depth)
+        flat, offsets = segment_positions(starts + lengths - take, take)
+        owner = np.repeat(np.arange(n_series), take)
+        state = np.full((n_series, self.depth), np.nan)
+        state[owner, self.depth - take[owner] + offsets] = values[flat]
+        num = np.zeros(n_series)
+        den = np.zeros(n_series)
+        if self.ewm_alpha is not None:
+            ewm_values(values, starts, lengths, self.ewm_alpha, num, den)
+        return state, num, den
+
+    def step_features(self, state, num, den):
+        d = self.depth
+        columns = [state[:, d - lag] for lag in range(1, self.lags + 1)]
+        total = state[:, d - 1].copy()
+        for k in range(2, self.rolling_window + 1):
+            total = total + state[:, d - k]
+        columns.append(total / self.rolling_window)
+        if self.ewm_alpha is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                columns.append(np.where(den > 0, num / den, np.nan))
+        return np.column_stack(columns).astype(np.float32)
+
+    ## Forecasting
+
+    @traced(rows_arg=1)
+    def predict(self, df):
+        """Forecast ``horizon`` steps past the end of every series in ``df``."""
+        if not self.models:
+            raise ValueError('Forecaster is not fitted')
+        state, num, den, series, last_dates = self.initial_state(df)
+        forecasts = self.forecast_array(state, num, den)
+        return self._frame(series, last_dates, forecasts)
+
+    def forecast_array(self, state, num, den, models=None):
+        """(series x horizon) forecasts from initial_state arrays; ``state`` is advanced in place."""
+        models = self.models if models is None else models
+        forecasts = np.empty((len(state), self.horizon))
+        if self.mode == 'direct':
+            X = self.step_features(state, num, den)
+            for h, model in enumerate(models):
+                forecasts[:, h] = model.predict(X)
+        else:
+            decay = 1.0 - (self.ewm_alpha or 0.0)
+            for h in range(self.horizon):
+                yhat = models[0].predict(self.step_features(state, num, den)).astype(np.float64)
+                forecasts[:, h] = yhat
+                state[:, :-1] = state[:, 1:]
+                state[:, -1] = yhat
+                num = num * decay + yhat
+                den = den * decay + 1.0
+        return forecasts
+
+    def _frame(self, series, last_dates, forecasts):
+        step = self.date_step
+        if np.issubdtype(last_dates.dtype, np.datetime64) and isinstance(step, (int, np.integer)):
+            step = np.timedelta64(step, 'D')
+        horizons = np.arange(1, self.horizon + 1)
+        return pd.DataFrame({
+            self.series_col: np.repeat(series, self.horizon),
+            self.date_col: np.repeat(last_dates, self.horizon) + np.tile(horizons, len(series)) * step,
+            'horizon': np.tile(horizons, len(series)),
+            f'{self.target_col}_forecast': forecasts.ravel(),
+        })
+
+
+# Example usage
+# forecaster = Forecaster('demand', 'sku', 'date', horizon=28, mode='recursive').fit(df)
+# forecast = forecaster.predict(df)
+# direct = Forecaster('demand', 'sku', 'date', horizon=28, mode='direct').fit(df).predict(df)
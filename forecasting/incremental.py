@@ -0,0 +1,133 @@
+# Incremental (append-only) lag, rolling mean and EWM features
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from forecasting.features import (ewm_values, lag_values, rolling_mean_values, segment_positions,
+                                  series_layout)
+from forecasting.instrument import traced
+
+
+class IncrementalFeatures:
+    """Per-series feature state so appended rows are featurized on their own.
+
+    Keeps the last ``max(lags, rolling_window - 1)`` values and the EWM
+    accumulators of every series. Feeding the history and then each new
+    batch produces exactly the rows grouped_feature_engineering would give
+    for the concatenated data, and each update costs O(new rows).
+    """
+
+    def __init__(self, target_col, series_col, date_col, lags=3, rolling_window=3,
+                 ewm_alpha=None, dropna=True):
+        self.target_col = target_col
+        self.series_col = series_col
+        self.date_col = date_col
+        self.lags = lags
+        self.rolling_window = rolling_window
+        self.ewm_alpha = ewm_alpha
+        self.dropna = dropna
+        self.depth = max(lags, rolling_window - 1)
+        self.ids = pd.Index([])
+        self.tail = np.empty((0, self.depth))  # right aligned, oldest first
+        self.count = np.zeros(0, dtype=np.int64)
+        self.num = np.zeros(0)
+        self.den = np.zeros(0)
+        self.last_date = None
+
+    ## State
+
+    def _series_index(self, keys, dates):
+        idx = self.ids.get_indexer(keys)
+        new = idx < 0
+        if self.last_date is not None and (~new).any():
+            if (dates[~new] <= self.last_date[idx[~new]]).any():
+                raise ValueError('update expects only rows after the last date seen for each series')
+        if new.any():
+            n_new = int(new.sum())
+            idx[new] = np.arange(len(self.ids), len(self.ids) + n_new)
+            self.ids = self.ids.append(pd.Index(keys[new]))
+            self.tail = np.vstack([self.tail, np.full((n_new, self.depth), np.nan)])
+            self.count = np.concatenate([self.count, np.zeros(n_new, dtype=np.int64)])
+            self.num = np.concatenate([self.num, np.zeros(n_new)])
+            self.den = np.concatenate([self.den, np.zeros(n_new)])
+            fresh = dates[:0] if self.last_date is None else self.last_date
+            self.last_date = np.concatenate([fresh, dates[new]])
+        return idx
+
+    ## Update
+
+    @traced(rows_arg=1)
+    def update(self, df):
+        """Featurize appended rows and advance the per-series state."""
+        tc = self.target_col
+        df, _, pos, starts, lengths = series_layout(df, self.series_col, self.date_col)
+        values = df[tc].to_numpy(dtype=np.float64)
+        dates = df[self.date_col].to_numpy()
+        keys = df[self.series_col].to_numpy()[starts]
+        idx = self._series_index(keys, dates[starts])
+
+        # Mini panel per touched series: buffered tail followed by the new rows
+        buffered = self.count[idx]
+        mini_lengths = buffered + lengths
+        mini_starts = np.cumsum(mini_lengths) - mini_lengths
+        mini = np.empty(int(mini_lengths.sum()))
+        flat, offsets = segment_positions(mini_starts, buffered)
+        owner = np.repeat(np.arange(len(idx)), buffered)
+        mini[flat] = self.tail[idx[owner], self.depth - buffered[owner] + offsets]
+        new_rows = np.repeat(mini_starts + buffered, lengths) + pos
+        mini[new_rows] = values
+        mini_pos = np.arange(len(mini)) - np.repeat(mini_starts, mini_lengths)
+
+        features = {}
+        for lag in range(1, self.lags + 1):
+            features[f'{tc}_lag_{lag}'] = lag_values(mini, mini_pos, lag)[new_rows]
+        features[f'{tc}_rolling_mean'] = rolling_mean_values(mini, mini_pos, self.rolling_window)[new_rows]
+        if self.ewm_alpha is not None:
+            num, den = self.num[idx], self.den[idx]
+            features[f'{tc}_ewm'] = ewm_values(values, starts, lengths, self.ewm_alpha, num, den)
+            self.num[idx] = num
+            self.den[idx] = den
+
+        # Keep the last `depth` values of every touched series
+        kept = np.minimum(mini_lengths, self.depth)
+        flat, offsets = segment_positions(mini_starts + mini_lengths - kept, kept)
+        owner = np.repeat(np.arange(len(idx)), kept)
+        self.tail[idx[owner], self.depth - kept[owner] + offsets] = mini[flat]
+        self.count[idx] = kept
+        self.last_date[idx] = dates[starts + lengths - 1]
+
+        df = pd.concat([df, pd.DataFrame(features, index=df.index)], axis=1)
+        if self.dropna:
+            df = df.dropna(subset=list(features)).reset_index(drop=True)
+        return df
+
+    ## Persistence
+
+    def save(self, path):
+        params = {k: getattr(self, k) for k in ('target_col', 'series_col', 'date_col', 'lags',
+                                                'rolling_window', 'ewm_alpha', 'dropna')}
+        np.savez(path, params=np.array(json.dumps(params)), ids=self.ids.to_numpy(dtype=object),
+                 tail=self.tail, count=self.count, num=self.num, den=self.den,
+                 last_date=self.last_date if self.last_date is not None else np.array([]))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as data:
+            state = cls(**json.loads(str(data['params'])))
+            state.ids = pd.Index(data['ids'])
+            state.tail = data['tail']
+            state.count = data['count']
+            state.num = data['num']
+            state.den = data['den']
+            state.last_date = data['last_date'] if len(state.ids) else None
+        return state
+
+
+# Example usage
+# state = IncrementalFeatures('demand', 'sku', 'date', lags=3, rolling_window=3, ewm_alpha=0.3)
+# history = state.update(df)            # full history once
+# state.save('feature_state.npz')
+# state = IncrementalFeatures.load('feature_state.npz')
+# today = state.update(new_day_df)      # only the appended rows
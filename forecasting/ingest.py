@@ -0,0 +1,141 @@
+# Chunked, typed CSV ingestion with a Parquet cache
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from forecasting.instrument import traced
+
+
+## Schema
+
+def _value_columns(header, series_col, date_col, id_cols):
+    skip = {series_col, date_col, *id_cols}
+    return [c for c in header if c not in skip]
+
+
+def _text_columns(filepath, value_cols, nrows=10_000):
+    # columns that do not parse as numbers in the first rows (store, region, ...)
+    if not value_cols:
+        return []
+    sample = pd.read_csv(filepath, nrows=nrows, usecols=value_cols)
+    return [c for c in value_cols if not pd.api.types.is_numeric_dtype(sample[c])]
+
+
+def _read_dtypes(series_col, id_cols, value_cols):
+    dtypes = {c: 'float32' for c in value_cols}
+    for c in (series_col, *id_cols):
+        dtypes[c] = 'str'
+    return dtypes
+
+
+def _to_day_number(dates):
+    # int32 days since 1970-01-01
+    days = pd.to_datetime(dates).to_numpy(dtype='datetime64[D]')
+    return days.astype(np.int64).astype(np.int32)
+
+
+def _chunk_table(chunk, date_col, value_cols):
+    arrays = {}
+    for c in chunk.columns:
+        if c in value_cols:
+            arrays[c] = pa.array(chunk[c].to_numpy(), type=pa.float32(), from_pandas=True)
+        elif c == date_col:
+            arrays[c] = pa.array(chunk[c].to_numpy(), type=pa.int32())
+        else:
+            arrays[c] = pa.array(chunk[c].to_numpy(dtype=object)).dictionary_encode()
+    return pa.table(arrays)
+
+
+## Per-series Forward Fill
+
+def _ffill_chunk(chunk, series_col, value_cols, carry):
+    """Forward fill inside each series, continuing from the previous chunk."""
+    chunk[value_cols] = chunk.groupby(series_col, sort=False)[value_cols].ffill()
+    if carry is not None and chunk[value_cols].isna().any().any():
+        previous = carry.reindex(chunk[series_col].to_numpy())
+        previous.index = chunk.index
+        chunk[value_cols] = chunk[value_cols].fillna(previous)
+    last = chunk.groupby(series_col, sort=False)[value_cols].last()
+    carry = last if carry is None else last.combine_first(carry)
+    return chunk, carry
+
+
+## Cache
+
+def cache_key(filepath, **params):
+    st = os.stat(filepath)
+    payload = json.dumps({'path': os.path.abspath(filepath), 'size': st.st_size,
+                          'mtime': st.st_mtime_ns, 'params': params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def read_cache(path):
+    table = pq.read_table(path, memory_map=True)
+    return table.to_pandas(self_destruct=True)
+
+
+## Streaming Loader
+
+@traced()
+def load_sales(filepath, series_col, date_col, id_cols=(), cache_dir=None,
+               chunksize=1_000_000):
+    """Stream a sales CSV into a downcast frame, cached as Parquet.
+
+    Values become float32, ids categorical and dates int32 day numbers.
+    Text columns not listed in ``id_cols`` are detected from the first rows
+    and loaded as ids too. Gaps are forward filled within each series
+    only, across chunks.
+    """
+    id_cols = tuple(id_cols)
+    cache_path = None
+    if cache_dir is not None:
+        key = cache_key(filepath, series_col=series_col, date_col=date_col, id_cols=id_cols)
+        stem = os.path.splitext(os.path.basename(filepath))[0]
+        cache_path = os.path.join(cache_dir, f'{stem}-{key}.parquet')
+        if os.path.exists(cache_path):
+            return read_cache(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    header = pd.read_csv(filepath, nrows=0).columns
+    value_cols = _value_columns(header, series_col, date_col, id_cols)
+    id_cols += tuple(_text_columns(filepath, value_cols))
+    value_cols = _value_columns(header, series_col, date_col, id_cols)
+    dtypes = _read_dtypes(series_col, id_cols, value_cols)
+
+    tmp_path = f'{cache_path}.tmp' if cache_path else None
+    writer = None
+    frames = []
+    carry = None
+    try:
+        for chunk in pd.read_csv(filepath, dtype=dtypes, chunksize=chunksize):
+            chunk[date_col] = _to_day_number(chunk[date_col])
+            chunk, carry = _ffill_chunk(chunk, series_col, value_cols, carry)
+            if tmp_path is None:
+                frames.append(chunk)
+                continue
+            table = _chunk_table(chunk, date_col, value_cols)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if tmp_path is None:
+        df = pd.concat(frames, ignore_index=True)
+        for c in (series_col, *id_cols):
+            df[c] = df[c].astype('category')
+        return df
+    os.replace(tmp_path, cache_path)
+    return read_cache(cache_path)
+
+
+# Example usage
+# df = load_sales('sales.csv', series_col='sku', date_col='date',
+#                 id_cols=['store'], cache_dir='.cache/ingest')
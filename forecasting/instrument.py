@@ -0,0 +1,189 @@
+# Stage-level timing and memory spans for the pipeline
+#
+# Disabled unless FORECAST_TRACE=1 or enable() is called; a disabled span
+# is a shared no-op context, so instrumented code pays one attribute check.
+#
+# Memory: rss_delta_mb is the change in resident set across the span, the
+# per-stage signal. rss_peak_mb is the process's lifetime high-water mark
+# when the span ends; it only says the peak happened in this span or
+# before it.
+
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+
+def rss_peak_mb():
+    """Lifetime peak resident set of this process, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+_PAGE_MB = os.sysconf('SC_PAGE_SIZE') / 1024 ** 2 if hasattr(os, 'sysconf') else 0.0
+_statm = {}
+
+
+def rss_mb():
+    # current resident set from a descriptor kept open per process, so a span costs no open()
+    pid = os.getpid()
+    fd = _statm.get(pid)
+    try:
+        if fd is None:
+            fd = _statm[pid] = os.open(f'/proc/{pid}/statm', os.O_RDONLY)
+        return int(os.pread(fd, 128, 0).split()[1]) * _PAGE_MB
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+## Spans
+
+class Span:
+    __slots__ = ('tracer', 'name', 'rows', 'path', 'start', 'cpu', 'rss')
+
+    def __init__(self, tracer, name, rows=None):
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.path = f'{stack[-1].path};{self.name}' if stack else self.name
+        stack.append(self)
+        self.rss = rss_mb()
+        self.cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.cpu
+        self.tracer._stack().pop()
+        rss = rss_mb()
+        self.tracer._record({
+            'name': self.name,
+            'path': self.path,
+            'start': self.start - self.tracer.origin,
+            'seconds': wall,
+            'cpu_seconds': cpu,
+            'rows': self.rows,
+            'rss_delta_mb': rss - self.rss if rss is not None and self.rss is not None else None,
+            'rss_peak_mb': rss_peak_mb(),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'error': exc[0].__name__ if exc[0] is not None else None,
+        })
+        return False
+
+
+class _NoSpan:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+## Tracer
+
+class Tracer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.records = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def span(self, name, rows=None):
+        """Context manager timing a block; set ``.rows`` on it if the count is known later."""
+        if not self.enabled:
+            return _NO_SPAN
+        return Span(self, name, rows)
+
+    def traced(self, name=None, rows_arg=0):
+        """Decorator wrapping each call in a span; rows are len() of positional arg ``rows_arg``."""
+        def decorate(fn):
+            span_name = name or f'{fn.__module__.rpartition(".")[2]}.{fn.__qualname__}'
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                data = args[rows_arg] if len(args) > rows_arg else None
+                rows = len(data) if hasattr(data, '__len__') else None
+                with Span(self, span_name, rows):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+            self.origin = time.perf_counter()
+
+    ## Export
+
+    def write_jsonl(self, path):
+        with open(path, 'a') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+
+    def write_chrome_trace(self, path):
+        """Trace Event Format (chrome://tracing, Perfetto, speedscope)."""
+        events = [{'name': r['name'], 'ph': 'X', 'ts': r['start'] * 1e6, 'dur': r['seconds'] * 1e6,
+                   'pid': r['pid'], 'tid': r['tid'],
+                   'args': {k: r[k] for k in ('rows', 'cpu_seconds', 'rss_delta_mb', 'rss_peak_mb')}}
+                  for r in self.records]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def write_collapsed(self, path):
+        """Collapsed stacks for flamegraph.pl: self time per path in microseconds."""
+        totals = {}
+        for r in self.records:
+            totals[r['path']] = totals.get(r['path'], 0.0) + r['seconds']
+        for r in self.records:
+            parent = r['path'].rpartition(';')[0]
+            if parent in totals:
+                totals[parent] -= r['seconds']
+        with open(path, 'w') as f:
+            for stack, seconds in sorted(totals.items()):
+                f.write(f'{stack} {max(0, int(seconds * 1e6))}\n')
+
+
+TRACER = Tracer(enabled=os.environ.get('FORECAST_TRACE', '') not in ('', '0'))
+span = TRACER.span
+traced = TRACER.traced
+
+
+def enable():
+    TRACER.enabled = True
+
+
+def disable():
+    TRACER.enabled = False
+
+
+# Example usage
+# enable()
+# with span('fit', rows=len(X_train)):
+#     model.fit(X_train, y_train)
+# TRACER.write_jsonl('trace.jsonl'); TRACER.write_chrome_trace('trace.json')
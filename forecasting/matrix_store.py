@@ -0,0 +1,251 @@
+# Memory-mapped float32 feature matrices shared by training and inference
+#
+# A store is a directory with features.npy (C-order float32, rows x features),
+# target.npy (float64), dates.npy when a date column is given, and
+# matrix.json (names, target, scaler once applied). Rows are stored in date
+# order, so train/test partitions are row slices of the mapping; scaling is
+# written back in place chunk by chunk, and any process can
+# np.load(mmap_mode='r') the same pages without a copy.
+
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+from forecasting.backtest import time_split
+from forecasting.instrument import traced
+
+
+FEATURES = 'features.npy'
+TARGET = 'target.npy'
+DATES = 'dates.npy'
+META = 'matrix.json'
+CHUNK_ROWS = 1 << 16
+
+
+## Write
+
+def _rows(dest, start, n):
+    # destination rows of source rows [start, start + n): a slice, or scattered into date order
+    return slice(start, start + n) if dest is None else dest[start:start + n]
+
+
+def _fill_from_frame(X, y, df, feature_cols, target_col, chunk_rows, dest=None):
+    for start in range(0, len(df), chunk_rows):
+        part = df.iloc[start:start + chunk_rows]
+        rows = _rows(dest, start, len(part))
+        X[rows] = part[feature_cols].to_numpy(dtype=np.float32)
+        y[rows] = part[target_col].to_numpy(dtype=np.float64)
+
+
+def _fill_from_parquet(X, y, path, feature_cols, target_col, dest=None):
+    # One column of one row group at a time: row groups can be the whole file
+    import pyarrow.parquet as pq
+    parquet = pq.ParquetFile(path)
+    start = 0
+    for rg in range(parquet.num_row_groups):
+        n = parquet.metadata.row_group(rg).num_rows
+        rows = _rows(dest, start, n)
+        for j, c in enumerate(feature_cols):
+            X[rows, j] = parquet.read_row_group(rg, columns=[c]).column(0).to_numpy()
+        y[rows] = parquet.read_row_group(rg, columns=[target_col]).column(0).to_numpy()
+        start += n
+
+
+@traced()
+def write_matrix(source, target_col, path, feature_cols=None, drop=(), date_col=None,
+                 chunk_rows=CHUNK_ROWS):
+    """Write a DataFrame or Parquet file as a feature store, ``chunk_rows`` rows at a time.
+
+    Features default to every column except the target, ``date_col`` and
+    ``drop``. With ``date_col`` the rows are stored sorted by date (stable),
+    so split() holds out the most recent dates of every series. Only one
+    chunk (or Parquet column chunk) is held in memory at a time.
+    """
+    if isinstance(source, str):
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(source)
+        columns, n_rows = schema.names, pq.ParquetFile(source).metadata.num_rows
+    else:
+        columns, n_rows = list(source.columns), len(source)
+    if feature_cols is None:
+        skip = {target_col, date_col, *drop}
+        feature_cols = [c for c in columns if c not in skip]
+    feature_cols = list(feature_cols)
+
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    os.makedirs(tmp_path)
+    dest = None
+    if date_col is not None:
+        if isinstance(source, str):
+            dates = pq.read_table(source, columns=[date_col]).column(0).to_numpy()
+        else:
+            dates = source[date_col].to_numpy()
+        order = np.argsort(dates, kind='stable')
+        dest = np.empty(n_rows, dtype=np.int64)
+        dest[order] = np.arange(n_rows)
+        np.save(os.path.join(tmp_path, DATES), dates[order])
+        del dates, order
+    X = np.lib.format.open_memmap(os.path.join(tmp_path, FEATURES), mode='w+', dtype=np.float32,
+                                  shape=(n_rows, len(feature_cols)))
+    y = np.lib.format.open_memmap(os.path.join(tmp_path, TARGET), mode='w+', dtype=np.float64,
+                                  shape=(n_rows,))
+    if isinstance(source, str):
+        _fill_from_parquet(X, y, source, feature_cols, target_col, dest)
+    else:
+        _fill_from_frame(X, y, source, feature_cols, target_col, chunk_rows, dest)
+    X.flush()
+    y.flush()
+    del X, y
+    with open(os.path.join(tmp_path, META), 'w') as f:
+        json.dump({'feature_names': feature_cols, 'target_col': target_col, 'date_col': date_col,
+                   'n_rows': n_rows, 'scaler': None}, f, indent=1)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return FeatureMatrix(path)
+
+
+## Scaler
+
+def chunked_scaler(batches, n_features):
+    """StandardScaler fitted in one pass with Chan's parallel mean/variance merge."""
+    from sklearn.preprocessing import StandardScaler
+
+    count = np.zeros(n_features)
+    mean = np.zeros(n_features)
+    m2 = np.zeros(n_features)
+    for X in batches:
+        n_b = np.sum(~np.isnan(X), axis=0)
+        seen = n_b > 0
+        mean_b = np.zeros(n_features)
+        m2_b = np.zeros(n_features)
+        mean_b[seen] = np.nanmean(X[:, seen], axis=0, dtype=np.float64)
+        m2_b[seen] = np.nansum((X[:, seen] - mean_b[seen]) ** 2, axis=0, dtype=np.float64)
+        total = count + n_b
+        delta = mean_b - mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(total > 0, mean + delta * n_b / total, 0.0)
+            m2 = m2 + m2_b + np.where(total > 0, delta ** 2 * count * n_b / total, 0.0)
+        count = total
+    scaler = StandardScaler()
+    scaler.n_features_in_ = n_features
+    scaler.n_samples_seen_ = count.astype(np.int64)
+    scaler.mean_ = mean
+    scaler.var_ = np.where(count > 0, m2 / np.maximum(count, 1), 0.0)
+    scale = np.sqrt(scaler.var_)
+    scaler.scale_ = np.where(scale > 0, scale, 1.0)
+    return scaler
+
+
+## Store
+
+class FeatureMatrix:
+    """A feature store opened as memory maps; ``mode='r+'`` allows in-place scaling."""
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.mode = mode
+        with open(os.path.join(path, META)) as f:
+            self.meta = json.load(f)
+        self.feature_names = self.meta['feature_names']
+        self.target_col = self.meta['target_col']
+        self.X = np.load(os.path.join(path, FEATURES), mmap_mode=mode)
+        self.y = np.load(os.path.join(path, TARGET), mmap_mode='r')
+        self.date_col = self.meta.get('date_col')
+        self.dates = np.load(os.path.join(path, DATES), mmap_mode='r') if self.date_col else None
+
+    def __len__(self):
+        return len(self.X)
+
+    @property
+    def scaled(self):
+        return self.meta['scaler'] is not None
+
+    def split(self, test_size=0.2):
+        """(X_train, X_test, y_train, y_test) as views; the test set is the last rows.
+
+        With stored dates that is every row on the most recent ``test_size``
+        of distinct dates (as backtest.time_split); without them the rows
+        must already be in time order.
+        """
+        if self.dates is not None:
+            cut = int(np.count_nonzero(time_split(self.dates, test_size)))
+        else:
+            cut = len(self) - int(np.ceil(len(self) * test_size))
+        return self.X[:cut], self.X[cut:], self.y[:cut], self.y[cut:]
+
+    def fit_scaler(self, stop=None, chunk_rows=CHUNK_ROWS):
+        stop = len(self) if stop is None else stop
+        batches = (self.X[start:min(start + chunk_rows, stop)] for start in range(0, stop, chunk_rows))
+        return chunked_scaler(batches, len(self.feature_names))
+
+    @traced()
+    def scale_in_place(self, scaler, chunk_rows=CHUNK_ROWS):
+        """Overwrite the features with scaler.transform, one chunk at a time.
+
+        Each chunk is transformed in float64 and stored back as float32, the
+        precision XGBoost trains on anyway.
+        """
+        if self.mode != 'r+':
+            raise ValueError('open the store with mode="r+" to scale it in place')
+        if self.scaled:
+            raise ValueError(f'{self.path} is already scaled')
+        mean = np.asarray(scaler.mean_, dtype=np.float64)
+        scale = np.asarray(scaler.scale_, dtype=np.float64)
+        for start in range(0, len(self), chunk_rows):
+            part = self.X[start:start + chunk_rows]
+            part[:] = (part - mean) / scale
+        self.X.flush()
+        self.meta['scaler'] = {'mean': mean.tolist(), 'scale': scale.tolist()}
+        tmp = os.path.join(self.path, f'{META}.{uuid.uuid4().hex}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, META))
+
+    def scaler(self):
+        """The StandardScaler applied to the stored features, or None."""
+        if not self.scaled:
+            return None
+        from sklearn.preprocessing import StandardScaler
+        scaler = StandardScaler()
+        scaler.mean_ = np.array(self.meta['scaler']['mean'])
+        scaler.scale_ = np.array(self.meta['scaler']['scale'])
+        scaler.var_ = scaler.scale_ ** 2
+        scaler.n_features_in_ = len(self.feature_names)
+        return scaler
+
+
+## Inference
+
+@traced(rows_arg=1)
+def predict_matrix(artifact, matrix, start=0, stop=None, chunk_rows=CHUNK_ROWS):
+    """Score rows [start, stop) of a store with a loaded artifact, chunk by chunk.
+
+    A store scaled with the artifact's own scaler goes straight to the
+    booster; an unscaled one is transformed per chunk.
+    """
+    if matrix.feature_names != artifact.feature_names:
+        raise ValueError('feature store columns do not match the model features')
+    if matrix.scaled:
+        stored = matrix.meta['scaler']
+        if not (np.allclose(stored['mean'], artifact.scaler.mean)
+                and np.allclose(stored['scale'], artifact.scaler.scale)):
+            raise ValueError('feature store was scaled with a different scaler than the model')
+        score = artifact.model.predict
+    else:
+        score = artifact.predict
+    stop = len(matrix) if stop is None else stop
+    out = np.empty(stop - start, dtype=np.float32)
+    for lo in range(start, stop, chunk_rows):
+        hi = min(lo + chunk_rows, stop)
+        out[lo - start:hi - start] = score(matrix.X[lo:hi])
+    return out
+
+
+# Example usage
+# matrix = write_matrix(df, 'demand', 'stores/demand', drop=['sku'], date_col='date')  # or a Parquet path
+# model, scaler = train_model(FeatureMatrix('stores/demand', mode='r+'), 'demand', headless=True)
+# y_pred = predict_matrix(load_artifact('models/demand'), FeatureMatrix('stores/demand'))  # another process
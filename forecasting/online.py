@@ -0,0 +1,237 @@
+# Online (per-event) feature state for real-time single-series predictions
+
+import json
+
+import numpy as np
+
+from forecasting.features import (degree2_terms, describe_features, ewm_values, expand_polynomial,
+                                  grouped_feature_engineering, series_layout, term_name)
+
+
+class OnlineFeatures:
+    """Ring buffer of recent values per series, producing model-ready feature vectors.
+
+    ``update(series, value)`` records one observation and returns the
+    feature row grouped_feature_engineering (plus expand_polynomial terms)
+    would give for it, laid out in ``feature_names`` order. Lags and the
+    rolling mean read a fixed-size buffer and the EWM keeps two running
+    accumulators, so an update costs the same however long the history is.
+    """
+
+    def __init__(self, target_col, feature_names, lags=3, rolling_window=3, ewm_alpha=None,
+                 capacity=1024):
+        self.target_col = target_col
+        self.feature_names = list(feature_names)
+        self.lags = lags
+        self.rolling_window = rolling_window
+        self.ewm_alpha = ewm_alpha
+        # slot 0 of a read is the current value, slot k the value k steps back
+        self.depth = max(lags, rolling_window - 1) + 1
+        self.slots = {}
+        self.buffer = np.full((capacity, self.depth), np.nan)
+        self.head = np.zeros(capacity, dtype=np.int64)  # next write position
+        self.num = np.zeros(capacity)
+        self.den = np.zeros(capacity)
+        self._plan()
+
+    ## Column Layout
+
+    def _plan(self):
+        tc = self.target_col
+        base = [f'{tc}_lag_{k}' for k in range(1, self.lags + 1)] + [f'{tc}_rolling_mean', f'{tc}_ewm']
+        base_pos = {name: i for i, name in enumerate(base)}
+        terms = {term_name(t): t for t in degree2_terms(base)}
+        self.base_cols, self.base_src = [], []
+        self.poly_cols, self.poly_a, self.poly_b = [], [], []
+        self.extra_cols = []
+        for j, name in enumerate(self.feature_names):
+            if name in base_pos:
+                self.base_cols.append(j)
+                self.base_src.append(base_pos[name])
+            elif name in terms:
+                a, b = terms[name]
+                self.poly_cols.append(j)
+                self.poly_a.append(base_pos[a])
+                self.poly_b.append(base_pos[b])
+            elif f'{tc}_' in name:
+                # a derived column this layout cannot build: fail now, not as NaN per request
+                raise ValueError(f'{name} cannot be produced online with lags={self.lags}')
+            else:
+                self.extra_cols.append((j, name))
+        if self.ewm_alpha is None and f'{tc}_ewm' in {self.feature_names[j] for j in self.base_cols}:
+            raise ValueError(f'{tc}_ewm is a model feature but ewm_alpha is None')
+        self.base_cols = np.array(self.base_cols, dtype=np.int64)
+        self.base_src = np.array(self.base_src, dtype=np.int64)
+        self.poly_cols = np.array(self.poly_cols, dtype=np.int64)
+        self.poly_a = np.array(self.poly_a, dtype=np.int64)
+        self.poly_b = np.array(self.poly_b, dtype=np.int64)
+        self._back = np.arange(self.depth)
+
+    @classmethod
+    def from_artifact(cls, artifact, ewm_alpha=None, capacity=1024):
+        """Feature layout from a saved bundle and its feature_params.
+
+        Lags missing from older bundles are read off the feature names; a
+        rolling mean or EWM feature without its recorded window or alpha
+        raises rather than being built with a guessed one.
+        """
+        tc = artifact.feature_params['target_col']
+        params = {**describe_features(tc, artifact.feature_names), **artifact.feature_params}
+        params.setdefault('ewm_alpha', ewm_alpha)
+        if 'rolling_window' not in params:
+            if any(f'{tc}_rolling_mean' in name for name in artifact.feature_names):
+                raise ValueError(f'{tc}_rolling_mean is a model feature but the artifact '
+                                 'records no rolling_window')
+            params['rolling_window'] = 1
+        return cls(tc, artifact.feature_names, lags=params['lags'],
+                   rolling_window=params['rolling_window'], ewm_alpha=params['ewm_alpha'],
+                   capacity=capacity)
+
+    ## State
+
+    def _slot(self, series):
+        slot = self.slots.get(series)
+        if slot is None:
+            slot = self.slots[series] = len(self.slots)
+            if slot == len(self.head):
+                grow = len(self.head)
+                self.buffer = np.vstack([self.buffer, np.full((grow, self.depth), np.nan)])
+                self.head = np.concatenate([self.head, np.zeros(grow, dtype=np.int64)])
+                self.num = np.concatenate([self.num, np.zeros(grow)])
+                self.den = np.concatenate([self.den, np.zeros(grow)])
+        return slot
+
+    def seed(self, df, series_col, date_col):
+        """Load the buffers and EWM state from history in one vectorized pass."""
+        df, _, _, starts, lengths = series_layout(df, series_col, date_col)
+        values = df[self.target_col].to_numpy(dtype=np.float64)
+        keys = df[series_col].to_numpy()[starts]
+        idx = np.array([self._slot(k) for k in keys], dtype=np.int64)
+        if self.ewm_alpha is not None:
+            num, den = self.num[idx], self.den[idx]
+            ewm_values(values, starts, lengths, self.ewm_alpha, num, den)
+            self.num[idx] = num
+            self.den[idx] = den
+        # last `kept` values of each series are written from the current head on
+        kept = np.minimum(lengths, self.depth)
+        for back in range(1, self.depth + 1):
+            has = kept >= back
+            pos = (self.head[idx[has]] + kept[has] - back) % self.depth
+            self.buffer[idx[has], pos] = values[starts[has] + lengths[has] - back]
+        self.head[idx] = (self.head[idx] + kept) % self.depth
+        return self
+
+    ## Update
+
+    def update(self, series, value, extra=None):
+        """Record one observation and return its feature vector in model column order.
+
+        ``extra`` maps any non-derived model columns (price, promo flags, ...)
+        to their values; missing ones are NaN.
+        """
+        slot = self._slot(series)
+        head = self.head[slot]
+        row = self.buffer[slot]
+        row[head] = value
+        self.head[slot] = (head + 1) % self.depth
+        recent = row[(head - self._back) % self.depth].tolist()
+
+        base = np.empty(self.lags + 2)
+        base[:self.lags] = recent[1:self.lags + 1]
+        # same additions in the same order as rolling_mean_values
+        total = recent[0]
+        for k in range(1, self.rolling_window):
+            total = total + recent[k]
+        base[self.lags] = total / self.rolling_window
+        if self.ewm_alpha is not None:
+            decay = 1.0 - self.ewm_alpha
+            seen = value == value
+            num = self.num[slot] = self.num[slot] * decay + (value if seen else 0.0)
+            den = self.den[slot] = self.den[slot] * decay + seen
+            base[self.lags + 1] = num / den if den > 0 else np.nan
+        else:
+            base[self.lags + 1] = np.nan
+
+        out = np.empty(len(self.feature_names))
+        out[self.base_cols] = base[self.base_src]
+        if len(self.poly_cols):
+            # expand_polynomial multiplies in float32
+            base32 = base.astype(np.float32)
+            out[self.poly_cols] = base32[self.poly_a] * base32[self.poly_b]
+        for j, name in self.extra_cols:
+            out[j] = np.nan if extra is None else extra.get(name, np.nan)
+        return out
+
+    ## Persistence
+
+    def save(self, path):
+        params = {k: getattr(self, k) for k in ('target_col', 'feature_names', 'lags',
+                                                'rolling_window', 'ewm_alpha')}
+        n = len(self.slots)
+        keys = np.empty(n, dtype=object)
+        keys[:] = list(self.slots)
+        np.savez(path, params=np.array(json.dumps(params)), keys=keys, buffer=self.buffer[:n],
+                 head=self.head[:n], num=self.num[:n], den=self.den[:n])
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as data:
+            keys = data['keys'].tolist()
+            state = cls(**json.loads(str(data['params'])), capacity=max(len(keys), 1))
+            state.slots = {k: i for i, k in enumerate(keys)}
+            n = len(keys)
+            state.buffer[:n] = data['buffer']
+            state.head[:n] = data['head']
+            state.num[:n] = data['num']
+            state.den[:n] = data['den']
+        return state
+
+
+## Parity with the Batch Features
+
+def check_parity(df, target_col, series_col, date_col, feature_names, lags=3, rolling_window=3,
+                 ewm_alpha=None, history=0.5):
+    """Replay ``df`` through OnlineFeatures and compare every row with the batch features.
+
+    The first ``history`` fraction of each series seeds the state; the rest
+    is fed one event at a time. Raises AssertionError on the first mismatch
+    (NaN counts as equal to NaN), otherwise returns the number of rows checked.
+    """
+    batch = grouped_feature_engineering(df, target_col, series_col, date_col, lags=lags,
+                                        rolling_window=rolling_window, ewm_alpha=ewm_alpha,
+                                        dropna=False)
+    poly = [t for t in degree2_terms([c for c in batch.columns if c.startswith(f'{target_col}_')])
+            if term_name(t) in feature_names]
+    batch = expand_polynomial(batch, poly)
+    extra = [c for c in feature_names if c not in batch.columns]
+    if extra:
+        raise ValueError(f'columns not in df or derivable: {extra}')
+
+    pos = batch.groupby(series_col, sort=False, observed=True).cumcount().to_numpy()
+    sizes = batch.groupby(series_col, sort=False, observed=True)[series_col].transform('size').to_numpy()
+    live = pos >= (sizes * history).astype(np.int64)
+    state = OnlineFeatures(target_col, feature_names, lags=lags, rolling_window=rolling_window,
+                           ewm_alpha=ewm_alpha)
+    state.seed(batch[~live], series_col, date_col)
+
+    passthrough = [c for c in feature_names if c in df.columns]
+    expected = batch.loc[live, feature_names].to_numpy(dtype=np.float64)
+    keys = batch.loc[live, series_col].to_numpy()
+    values = batch.loc[live, target_col].to_numpy(dtype=np.float64)
+    extras = batch.loc[live, passthrough].to_dict('records') if passthrough else [None] * len(keys)
+    for i in range(len(keys)):
+        got = state.update(keys[i], values[i], extras[i])
+        same = (got == expected[i]) | (np.isnan(got) & np.isnan(expected[i]))
+        if not same.all():
+            j = int(np.flatnonzero(~same)[0])
+            raise AssertionError(f'row {i} series {keys[i]!r} column {feature_names[j]!r}: '
+                                 f'online {got[j]!r} != batch {expected[i, j]!r}')
+    return len(keys)
+
+
+# Example usage
+# artifact = load_artifact('models/demand')
+# state = OnlineFeatures.from_artifact(artifact, ewm_alpha=0.3).seed(history_df, 'sku', 'date')
+# x = state.update('sku-42', 17.0, extra={'price': 2.49})
+# y_pred = artifact.predict(x[None, :])
+# check_parity(df, 'demand', 'sku', 'date', artifact.feature_names, ewm_alpha=0.3)
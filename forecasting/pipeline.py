@@ -0,0 +1,230 @@
+# Notebook pipeline: load, feature engineering and training
+#
+# sklearn, xgboost and matplotlib are imported inside the functions that
+# use them, so importing this module (or scoring with a saved artifact)
+# does not pay for them.
+
+import numpy as np
+import pandas as pd
+
+from forecasting.backtest import time_split
+from forecasting.calendar_features import join_calendar
+from forecasting.features import degree2_terms, expand_polynomial, grouped_feature_engineering
+from forecasting.ingest import load_sales
+from forecasting.instrument import span, traced
+from forecasting.matrix_store import FeatureMatrix, write_matrix
+
+
+## Load and Preprocess Dataset
+
+@traced('load_and_preprocess')
+def load_and_preprocess(filepath, series_col=None, date_col=None, cache_dir=None, id_cols=()):
+    # Large extracts: chunked typed read, per-series ffill, Parquet cache
+    if series_col is not None:
+        return load_sales(filepath, series_col, date_col, id_cols=id_cols, cache_dir=cache_dir)
+    df = pd.read_csv(filepath)
+    # Basic cleaning
+    df.ffill(inplace=True)
+    return df
+
+
+## Feature Engineering: Lag Features and Rolling Mean
+
+@traced('feature_engineering')
+def feature_engineering(df, target_col, lags=3, rolling_window=3, series_col=None, date_col=None,
+                        calendar=None, region_col=None):
+    # Panel data: build features per series in one vectorized pass
+    if series_col is not None:
+        df = grouped_feature_engineering(df, target_col, series_col, date_col,
+                                         lags=lags, rolling_window=rolling_window)
+    else:
+        for lag in range(1, lags+1):
+            df[f'{target_col}_lag_{lag}'] = df[target_col].shift(lag)
+        df[f'{target_col}_rolling_mean'] = df[target_col].rolling(window=rolling_window).mean()
+        df.dropna(inplace=True)  # drop NA created by shifting/rolling
+    # Calendar, holiday and promotion columns: a gather from a precomputed table by date
+    if calendar is not None:
+        df = join_calendar(df, calendar, date_col, region_col)
+    return df
+
+
+@traced('advanced_feature_engineering')
+def advanced_feature_engineering(df, target_col, lags=3, rolling_window=3, poly_terms='all',
+                                 series_col=None, date_col=None):
+    # Exponential weighted mean; per series for panel data
+    if series_col is not None:
+        df = grouped_feature_engineering(df, target_col, series_col, date_col, lags=lags,
+                                         rolling_window=rolling_window, ewm_alpha=0.3)
+    else:
+        df = feature_engineering(df, target_col, lags, rolling_window)
+        df[f'{target_col}_ewm'] = df[target_col].ewm(alpha=0.3).mean()
+    # Polynomial features for lagged values: 'all' squares and products,
+    # a list of (col, col) pairs, or None to skip (tree models split on lags directly)
+    if poly_terms is None:
+        return df
+    lag_features = [f'{target_col}_lag_{i}' for i in range(1, lags+1)]
+    if poly_terms == 'all':
+        poly_terms = degree2_terms(lag_features)
+    return expand_polynomial(df, poly_terms)
+
+
+## Train Model
+
+def _split_and_scale_matrix(matrix):
+    # Partitions are views of the mapped store and scaling overwrites it in place,
+    # so no full-size copy of the features is made
+    X_train, X_test, y_train, y_test = matrix.split(test_size=0.2)
+    scaler = matrix.scaler()
+    if scaler is None:
+        with span('scale', rows=len(matrix)):
+            scaler = matrix.fit_scaler(stop=len(X_train))
+            matrix.scale_in_place(scaler)
+    return X_train, X_test, y_train, y_test, scaler
+
+
+def _split_and_scale(df, target_col, matrix_dir=None, date_col=None):
+    # df may be a FeatureMatrix; with matrix_dir a frame is written to one first
+    if matrix_dir is not None and not isinstance(df, FeatureMatrix):
+        write_matrix(df, target_col, matrix_dir, date_col=date_col)
+        df = FeatureMatrix(matrix_dir, mode='r+')
+    if isinstance(df, FeatureMatrix):
+        return _split_and_scale_matrix(df)
+
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    # Time-ordered split, never shuffled. Panel frames come sorted by series,
+    # so with date_col the test set is every series' most recent 20% of dates;
+    # without it the rows must already be in date order.
+    if date_col is not None:
+        train = time_split(df[date_col].to_numpy(), test_size=0.2)
+        X = df.drop(columns=[target_col, date_col])
+        y = df[target_col]
+        X_train, X_test, y_train, y_test = X[train], X[~train], y[train], y[~train]
+    else:
+        X = df.drop(columns=[target_col])
+        y = df[target_col]
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+
+    with span('scale', rows=len(X)):
+        scaler = StandardScaler()
+        X_train_scaled = scaler.fit_transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+    return X_train_scaled, X_test_scaled, y_train, y_test, scaler
+
+
+def _report(y_test, y_pred):
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    mse = mean_squared_error(y_test, y_pred)
+    mae = mean_absolute_error(y_test, y_pred)
+
+    print(f'Mean Squared Error: {mse}')
+    print(f'Mean Absolute Error: {mae}')
+    return {'mse': float(mse), 'mae': float(mae)}
+
+
+@traced('train_model')
+def train_model(df, target_col, headless=False, plot_dir=None, matrix_dir=None, date_col=None):
+    from xgboost import XGBRegressor
+
+    X_train_scaled, X_test_scaled, y_train, y_test, scaler = _split_and_scale(df, target_col, matrix_dir,
+                                                                              date_col)
+
+    model = XGBRegressor(objective='reg:squarederror',
+                         learning_rate=0.1,
+                         n_estimators=100,
+                         max_depth=5,
+                         subsample=0.8,
+                         colsample_bytree=0.8,
+                         random_state=42)
+    with span('fit', rows=len(X_train_scaled)):
+        model.fit(X_train_scaled, y_train)
+
+    with span('predict', rows=len(X_test_scaled)):
+        y_pred = model.predict(X_test_scaled)
+
+    _report(y_test, y_pred)
+
+    # Headless: plots (if any) are written to plot_dir by a background process
+    if headless:
+        if plot_dir is not None:
+            from forecasting.plotting import get_renderer
+            get_renderer(plot_dir).actual_vs_predicted(np.asarray(y_test), y_pred)
+        return model, scaler
+
+    import matplotlib.pyplot as plt
+
+    # Plot actual vs predicted
+    plt.figure(figsize=(10,6))
+    plt.plot(np.asarray(y_test), label='Actual')
+    plt.plot(y_pred, label='Predicted')
+    plt.legend()
+    plt.title('Actual vs Predicted Demand')
+    plt.show()
+
+    return model, scaler
+
+
+@traced('hyperparameter_tuning')
+def hyperparameter_tuning(X_train, y_train, log_path=None, n_workers=None):
+    from forecasting.tuning import successive_halving
+
+    # Successive halving: n_estimators is the budget, weak configs stop early.
+    # Workers x XGBoost threads fit the CPU count; log_path makes reruns resume.
+    param_grid = {
+        'max_depth': [3, 5],
+        'learning_rate': [0.01, 0.1],
+        'subsample': [0.8, 1],
+        'colsample_bytree': [0.8, 1]
+    }
+    model, best_params = successive_halving(X_train, y_train, param_grid, max_resource=100,
+                                            cv=3, n_workers=n_workers, log_path=log_path)
+    print(f'Best parameters: {best_params}')
+    return model
+
+
+@traced('train_model_advanced')
+def train_model_advanced(df, target_col, headless=False, plot_dir=None, matrix_dir=None,
+                         date_col=None):
+    X_train_scaled, X_test_scaled, y_train, y_test, scaler = _split_and_scale(df, target_col, matrix_dir,
+                                                                              date_col)
+
+    model = hyperparameter_tuning(X_train_scaled, y_train)
+
+    with span('predict', rows=len(X_test_scaled)):
+        y_pred = model.predict(X_test_scaled)
+
+    _report(y_test, y_pred)
+
+    # Residual analysis
+    residuals = np.asarray(y_test) - y_pred
+
+    # Headless: plots (if any) are written to plot_dir by a background process
+    if headless:
+        if plot_dir is not None:
+            from forecasting.plotting import get_renderer
+            renderer = get_renderer(plot_dir)
+            renderer.residuals(y_pred, residuals)
+            renderer.actual_vs_predicted(np.asarray(y_test), y_pred)
+        return model, scaler
+
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10,6))
+    plt.scatter(y_pred, residuals)
+    plt.axhline(y=0, color='r', linestyle='--')
+    plt.xlabel('Predicted values')
+    plt.ylabel('Residuals')
+    plt.title('Residual Analysis')
+    plt.show()
+
+    # Plot actual vs predicted
+    plt.figure(figsize=(10,6))
+    plt.plot(np.asarray(y_test), label='Actual')
+    plt.plot(y_pred, label='Predicted')
+    plt.legend()
+    plt.title('Actual vs Predicted Demand')
+    plt.show()
+
+    return model, scaler
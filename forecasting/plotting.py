@@ -0,0 +1,117 @@
+# Off-thread, non-interactive rendering of training plots
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+## Downsampling
+
+def downsample_line(values, max_points=2000):
+    """Min/max decimation: keeps the peaks of a long series at a fixed size."""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n), values
+    size = -(-n // (max_points // 2))
+    full = n // size * size
+    blocks = values[:full].reshape(-1, size)
+    base = np.arange(0, full, size)
+    lows = base + np.where(np.isnan(blocks), np.inf, blocks).argmin(axis=1)
+    highs = base + np.where(np.isnan(blocks), -np.inf, blocks).argmax(axis=1)
+    keep = np.unique(np.concatenate([lows, highs, np.arange(full, n)]))
+    return keep, values[keep]
+
+
+def downsample_points(x, y, max_points=5000, seed=42):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= max_points:
+        return x, y
+    keep = np.sort(np.random.default_rng(seed).choice(len(x), max_points, replace=False))
+    return x[keep], y[keep]
+
+
+## Renderers (run in the worker process, no pyplot state)
+
+def _render_actual_vs_predicted(path, actual, predicted):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.plot(*actual, label='Actual')
+    ax.plot(*predicted, label='Predicted')
+    ax.legend()
+    ax.set_title('Actual vs Predicted Demand')
+    fig.savefig(path)
+    return path
+
+
+def _render_residuals(path, predicted, residuals):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.scatter(predicted, residuals)
+    ax.axhline(y=0, color='r', linestyle='--')
+    ax.set_xlabel('Predicted values')
+    ax.set_ylabel('Residuals')
+    ax.set_title('Residual Analysis')
+    fig.savefig(path)
+    return path
+
+
+## Background Renderer
+
+class PlotRenderer:
+    """Renders plot files in a separate process so training never waits on matplotlib."""
+
+    def __init__(self, plot_dir, max_points=2000):
+        self.plot_dir = plot_dir
+        self.max_points = max_points
+        self.pending = []
+        self.pool = None
+        os.makedirs(plot_dir, exist_ok=True)
+
+    def _submit(self, fn, name, *args):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn'))
+        future = self.pool.submit(fn, os.path.join(self.plot_dir, name), *args)
+        self.pending.append(future)
+        return future
+
+    def actual_vs_predicted(self, actual, predicted, name='actual_vs_predicted.png'):
+        return self._submit(_render_actual_vs_predicted, name,
+                            downsample_line(actual, self.max_points),
+                            downsample_line(predicted, self.max_points))
+
+    def residuals(self, predicted, residuals, name='residuals.png'):
+        return self._submit(_render_residuals, name,
+                            *downsample_points(predicted, residuals, self.max_points))
+
+    def wait(self):
+        """Block until every submitted plot is written; returns their paths."""
+        paths = [f.result() for f in self.pending]
+        self.pending = []
+        return paths
+
+    def close(self):
+        self.wait()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+_renderers = {}
+
+
+def get_renderer(plot_dir):
+    if plot_dir not in _renderers:
+        _renderers[plot_dir] = PlotRenderer(plot_dir)
+    return _renderers[plot_dir]
+
+
+# Example usage
+# renderer = get_renderer('plots')
+# renderer.actual_vs_predicted(y_test.values, y_pred)
+# renderer.wait()
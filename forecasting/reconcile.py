@@ -0,0 +1,120 @@
+# Hierarchical forecast aggregation and reconciliation with sparse matrices
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+
+from forecasting.instrument import traced
+
+
+## Hierarchy
+
+class Hierarchy:
+    """Sparse summing matrix for bottom series grouped by nested levels.
+
+    ``bottom`` has one row per bottom series (in forecast row order) with the
+    hierarchy columns, e.g. sku, store, category, region. ``levels`` lists
+    the aggregate levels as column lists; ``[]`` is the grand total. Node
+    rows are ordered aggregates first (level by level), then the bottom
+    series, so S = vstack([S_agg, I]). Only S_agg is stored.
+    """
+
+    def __init__(self, bottom, levels):
+        self.bottom = bottom.reset_index(drop=True)
+        self.levels = [list(level) for level in levels]
+        blocks = []
+        labels = []
+        for level in self.levels:
+            if level:
+                grouped = self.bottom.groupby(level, sort=True, observed=True)
+                codes = grouped.ngroup().to_numpy()
+                keys = grouped.size().index.to_frame(index=False)
+            else:
+                codes = np.zeros(len(self.bottom), dtype=np.int64)
+                keys = pd.DataFrame(index=range(1))
+            blocks.append(sp.csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))),
+                                        shape=(len(keys), len(codes))))
+            labels.append(keys.assign(level='/'.join(level) or 'total'))
+        self.S_agg = sp.vstack(blocks, format='csr') if blocks else sp.csr_matrix((0, len(self.bottom)))
+        labels.append(self.bottom.assign(level='bottom'))
+        nodes = pd.concat(labels, ignore_index=True)
+        self.nodes = nodes[['level', *self.bottom.columns]]
+
+    @property
+    def n_agg(self):
+        return self.S_agg.shape[0]
+
+    @property
+    def n_bottom(self):
+        return self.S_agg.shape[1]
+
+    def aggregate(self, Yb):
+        """All node values from bottom values, i.e. S @ Yb."""
+        Yb = np.asarray(Yb, dtype=np.float64).reshape(self.n_bottom, -1)
+        return np.vstack([self.S_agg @ Yb, Yb])
+
+    def frame(self, Y, columns=None):
+        return pd.concat([self.nodes, pd.DataFrame(np.asarray(Y), columns=columns)], axis=1)
+
+    def node_counts(self):
+        """Number of bottom series under every node."""
+        return np.concatenate([np.asarray(self.S_agg.sum(axis=1)).ravel(), np.ones(self.n_bottom)])
+
+
+## Reconciliation
+
+@traced(rows_arg=1)
+def bottom_up(hierarchy, Yb):
+    return hierarchy.aggregate(Yb)
+
+
+@traced(rows_arg=2)
+def top_down(hierarchy, top, history_bottom):
+    """Split the total forecast by each bottom series' share of historical volume."""
+    history = np.nansum(np.asarray(history_bottom, dtype=np.float64).reshape(hierarchy.n_bottom, -1), axis=1)
+    shares = history / history.sum() if history.sum() > 0 else np.full(hierarchy.n_bottom, 1 / hierarchy.n_bottom)
+    return hierarchy.aggregate(shares[:, None] * np.asarray(top, dtype=np.float64).reshape(1, -1))
+
+
+@traced(rows_arg=1)
+def mint(hierarchy, Y, weights='wls_struct'):
+    """MinT-style reconciliation with a diagonal error covariance W.
+
+    ``Y`` holds base forecasts for every node (nodes x horizon). ``weights``
+    is 'ols' (identity), 'wls_struct' (bottom count under each node) or a
+    vector of per-node error variances. Uses the constraint form
+    Y - W C' (C W C')^-1 C Y with C = [I, -S_agg], so the sparse system to
+    factor has one row per aggregate node, however many bottom series exist.
+    """
+    Y = np.asarray(Y, dtype=np.float64).reshape(hierarchy.n_agg + hierarchy.n_bottom, -1)
+    if isinstance(weights, str):
+        if weights == 'ols':
+            w = np.ones(len(Y))
+        elif weights == 'wls_struct':
+            w = hierarchy.node_counts()
+        else:
+            raise ValueError(f'Unknown weights {weights!r}')
+    else:
+        w = np.asarray(weights, dtype=np.float64)
+    n_agg = hierarchy.n_agg
+    w_agg, w_bottom = w[:n_agg], w[n_agg:]
+    S_agg = hierarchy.S_agg
+    Y_agg, Y_bottom = Y[:n_agg], Y[n_agg:]
+
+    incoherence = Y_agg - S_agg @ Y_bottom
+    system = sp.diags(w_agg) + S_agg @ sp.diags(w_bottom) @ S_agg.T
+    lam = splu(system.tocsc()).solve(incoherence)
+    return np.vstack([Y_agg - w_agg[:, None] * lam,
+                      Y_bottom + w_bottom[:, None] * (S_agg.T @ lam)])
+
+
+RECONCILERS = {'bottom_up': bottom_up, 'top_down': top_down, 'mint': mint}
+
+
+# Example usage
+# hierarchy = Hierarchy(bottom[['sku', 'store', 'category', 'region']],
+#                       levels=[[], ['region'], ['category'], ['category', 'region']])
+# Y = hierarchy.aggregate(bottom_forecasts)              # bottom-up, nodes x horizon
+# Y_rec = mint(hierarchy, base_forecasts, weights='wls_struct')
+# report = hierarchy.frame(Y_rec)
@@ -0,0 +1,202 @@
+# Local micro-batching inference server for XGBRegressor + StandardScaler
+
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from forecasting.artifacts import load_artifact
+
+
+## Latency and Throughput
+
+class ServingStats:
+    """Rolling latency window plus request, row and batch counters."""
+
+    def __init__(self, window=10000):
+        self.latencies = np.zeros(window)
+        self.window = window
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def record_batch(self, n_rows):
+        with self.lock:
+            self.batches += 1
+            self.rows += n_rows
+
+    def record_request(self, seconds):
+        with self.lock:
+            self.latencies[self.requests % self.window] = seconds
+            self.requests += 1
+
+    def snapshot(self):
+        with self.lock:
+            seen = self.latencies[:min(self.requests, self.window)]
+            elapsed = time.perf_counter() - self.started
+            p50, p99 = np.percentile(seen, [50, 99]) * 1000 if len(seen) else (0.0, 0.0)
+            return {'requests': self.requests,
+                    'rows': self.rows,
+                    'batches': self.batches,
+                    'mean_batch_rows': self.rows / self.batches if self.batches else 0.0,
+                    'p50_ms': float(p50),
+                    'p99_ms': float(p99),
+                    'requests_per_s': self.requests / elapsed,
+                    'rows_per_s': self.rows / elapsed}
+
+
+## Micro-batching
+
+def _n_features(scaler):
+    # sklearn StandardScaler or artifacts.ScalerParams
+    mean = getattr(scaler, 'mean_', None)
+    if mean is None:
+        mean = getattr(scaler, 'mean', None)
+    return None if mean is None else len(mean)
+
+
+class MicroBatcher:
+    """Coalesces concurrent requests into one scaler.transform + model.predict call."""
+
+    def __init__(self, model, scaler, max_batch_rows=4096, max_wait_ms=2.0, stats=None):
+        self.model = model
+        self.scaler = scaler
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats or ServingStats()
+        self.n_features = _n_features(scaler)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, rows):
+        # checked here so a malformed request fails alone, not the batch it would join
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.ndim != 2 or (self.n_features is not None and rows.shape[1] != self.n_features):
+            raise ValueError(f'expected a list of rows with {self.n_features} features, '
+                             f'got shape {rows.shape}')
+        future = Future()
+        self.queue.put((rows, future))
+        return future
+
+    def predict(self, rows):
+        return self.submit(rows).result()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def _collect(self):
+        item = self.queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        n_rows = len(item[0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)  # stop after this batch
+                break
+            batch.append(item)
+            n_rows += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            try:
+                X = np.concatenate([rows for rows, _ in batch])
+                pred = self.model.predict(self.scaler.transform(X))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.stats.record_batch(len(X))
+            offset = 0
+            for rows, future in batch:
+                future.set_result(pred[offset:offset + len(rows)])
+                offset += len(rows)
+
+
+## HTTP Server
+
+class _Handler(BaseHTTPRequestHandler):
+    batcher = None
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            self._reply(200, self.batcher.stats.snapshot())
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._reply(404, {'error': 'not found'})
+            return
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            instances = json.loads(self.rfile.read(length))['instances']
+            pred = self.batcher.predict(instances)
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._reply(500, {'error': f'{type(e).__name__}: {e}'})
+            return
+        self.batcher.stats.record_request(time.perf_counter() - start)
+        self._reply(200, {'predictions': pred.tolist()})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(model, scaler, host='127.0.0.1', port=8080, **batch_options):
+    """HTTP server with POST /predict, GET /metrics and GET /health; port=0 picks a free port."""
+    batcher = MicroBatcher(model, scaler, **batch_options)
+    handler = type('Handler', (_Handler,), {'batcher': batcher})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.batcher = batcher
+    return server
+
+
+def serve(artifact_path, host='127.0.0.1', port=8080, **batch_options):
+    artifact = load_artifact(artifact_path)
+    server = make_server(artifact.model, artifact.scaler, host, port, **batch_options)
+    try:
+        server.serve_forever()
+    finally:
+        server.batcher.close()
+        server.server_close()
+
+
+# Example usage
+# save_artifact('models/demand', model, scaler, feature_names)
+# serve('models/demand', port=8080)
+# curl -d '{"instances": [[1.0, 2.0, 3.0, 2.0]]}' http://127.0.0.1:8080/predict
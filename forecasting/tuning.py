@@ -0,0 +1,202 @@
+# Budget-aware parallel hyperparameter search for XGBRegressor
+
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from forecasting.instrument import traced
+
+
+BASE_PARAMS = {'objective': 'reg:squarederror', 'random_state': 42}
+
+
+## Thread Budget
+
+def thread_budget(n_workers=None, n_jobs=None):
+    """Split the machine between pool workers and XGBoost threads per worker."""
+    cpus = os.cpu_count() or 1
+    if n_workers is None:
+        n_workers = cpus if n_jobs is None else max(1, cpus // n_jobs)
+    if n_jobs is None:
+        n_jobs = max(1, cpus // n_workers)
+    return n_workers, n_jobs
+
+
+## Trials
+
+_data = {}
+
+
+def _init_worker(X, y):
+    # the training data is shipped once per worker, not once per trial
+    _data['X'] = X
+    _data['y'] = y
+
+
+def _run_trial(params, n_estimators, cv, n_jobs):
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import KFold
+    from xgboost import XGBRegressor
+
+    X, y = _data['X'], _data['y']
+    errors = []
+    for train_idx, test_idx in KFold(n_splits=cv).split(X):
+        model = XGBRegressor(**BASE_PARAMS, **params, n_estimators=n_estimators, n_jobs=n_jobs)
+        model.fit(X[train_idx], y[train_idx])
+        errors.append(mean_squared_error(y[test_idx], model.predict(X[test_idx])))
+    return float(np.mean(errors))
+
+
+def data_digest(X, y):
+    """Hash of the training data, so a reused log never serves another dataset's scores."""
+    h = hashlib.sha256()
+    for a in (X, y):
+        a = np.ascontiguousarray(a)
+        h.update(f'{a.dtype.str}{a.shape}'.encode())
+        h.update(a.data)
+    return h.hexdigest()
+
+
+def trial_key(params, n_estimators, cv, data=None):
+    return json.dumps({'params': params, 'n_estimators': n_estimators, 'cv': cv, 'data': data},
+                      sort_keys=True, default=str)
+
+
+def read_trial_log(log_path):
+    trials = {}
+    if log_path is None or not os.path.exists(log_path):
+        return trials
+    with open(log_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from an interrupted run
+            trials[record['key']] = record['mse']
+    return trials
+
+
+class TrialRunner:
+    """Evaluates configurations in a process pool, skipping trials already logged."""
+
+    def __init__(self, X, y, cv=3, n_workers=None, n_jobs=None, log_path=None):
+        self.X = np.asarray(X)
+        self.y = np.asarray(y)
+        self.cv = cv
+        self.n_workers, self.n_jobs = thread_budget(n_workers, n_jobs)
+        self.log_path = log_path
+        self.data = data_digest(self.X, self.y)
+        self.trials = read_trial_log(log_path)
+        self.pool = None
+
+    def __enter__(self):
+        if self.n_workers > 1:
+            self.pool = ProcessPoolExecutor(self.n_workers, initializer=_init_worker,
+                                            initargs=(self.X, self.y))
+        else:
+            _init_worker(self.X, self.y)
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _record(self, key, mse):
+        self.trials[key] = mse
+        if self.log_path is not None:
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps({'key': key, 'mse': mse}) + '\n')
+
+    def evaluate(self, configs, n_estimators):
+        keys = [trial_key(p, n_estimators, self.cv, self.data) for p in configs]
+        pending = [(k, p) for k, p in zip(keys, configs) if k not in self.trials]
+        if self.pool is None:
+            for key, params in pending:
+                self._record(key, _run_trial(params, n_estimators, self.cv, self.n_jobs))
+        else:
+            futures = {key: self.pool.submit(_run_trial, params, n_estimators, self.cv, self.n_jobs)
+                       for key, params in pending}
+            for key, future in futures.items():
+                self._record(key, future.result())
+        return [self.trials[k] for k in keys]
+
+
+## Successive Halving
+
+def _halving(runner, configs, min_resource, max_resource, eta):
+    n_rungs = int(math.floor(math.log(max_resource / min_resource, eta) + 1e-9)) + 1
+    for rung in range(n_rungs):
+        # the last survivor goes straight to the full budget
+        last = rung == n_rungs - 1 or len(configs) == 1
+        n_estimators = max_resource if last else min(max_resource, int(round(min_resource * eta ** rung)))
+        scores = runner.evaluate(configs, n_estimators)
+        if last:
+            break
+        order = np.argsort(scores, kind='stable')
+        configs = [configs[i] for i in order[:max(1, len(configs) // eta)]]
+    best = int(np.argmin(scores))
+    return configs[best], scores[best], n_estimators
+
+
+def _refit(X, y, params, n_estimators, n_jobs):
+    from xgboost import XGBRegressor
+    model = XGBRegressor(**BASE_PARAMS, **params, n_estimators=n_estimators, n_jobs=n_jobs)
+    model.fit(X, y)
+    return model
+
+
+@traced()
+def successive_halving(X, y, param_grid, max_resource=100, min_resource=None, eta=3,
+                       cv=3, n_workers=None, n_jobs=None, log_path=None):
+    """Successive halving over ``param_grid`` with n_estimators as the budget.
+
+    Every configuration gets a few trees, the best 1/eta move on with eta
+    times more, until the survivors train with ``max_resource`` trees.
+    Returns (best_estimator, best_params) refit on all of X, y.
+    """
+    from sklearn.model_selection import ParameterGrid
+
+    if min_resource is None:
+        min_resource = max(1, max_resource // eta ** 2)
+    configs = list(ParameterGrid(param_grid))
+    with TrialRunner(X, y, cv, n_workers, n_jobs, log_path) as runner:
+        params, mse, n_estimators = _halving(runner, configs, min_resource, max_resource, eta)
+        model = _refit(runner.X, runner.y, params, n_estimators, runner.n_workers * runner.n_jobs)
+    return model, {**params, 'n_estimators': n_estimators}
+
+
+@traced()
+def hyperband(X, y, param_grid, max_resource=100, eta=3, cv=3, n_workers=None,
+              n_jobs=None, log_path=None, random_state=42):
+    """Hyperband: several successive-halving brackets trading breadth for budget."""
+    from sklearn.model_selection import ParameterGrid
+
+    rng = np.random.default_rng(random_state)
+    grid = list(ParameterGrid(param_grid))
+    s_max = int(math.floor(math.log(max_resource, eta) + 1e-9))
+    best = None
+    with TrialRunner(X, y, cv, n_workers, n_jobs, log_path) as runner:
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+            picks = rng.choice(len(grid), size=min(n, len(grid)), replace=False)
+            configs = [grid[i] for i in sorted(picks)]
+            min_resource = max(1, int(round(max_resource / eta ** s)))
+            result = _halving(runner, configs, min_resource, max_resource, eta)
+            if best is None or result[1] < best[1]:
+                best = result
+        params, _, n_estimators = best
+        model = _refit(runner.X, runner.y, params, n_estimators, runner.n_workers * runner.n_jobs)
+    return model, {**params, 'n_estimators': n_estimators}
+
+
+# Example usage
+# model, best_params = successive_halving(X_train, y_train, {'max_depth': [3, 5]},
+#                                         max_resource=100, log_path='tuning.jsonl')
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from forecasting.backtest import backtest
+from forecasting.synthetic import demand_panel
+
+
+class MeanModel:
+    def __init__(self, n_jobs):
+        pass
+
+    def fit(self, X, y):
+        self.mean = float(np.mean(y))
+        return self
+
+    def predict(self, X):
+        return np.full(len(X), self.mean)
+
+
+def test_short_history_origins_are_skipped():
+    df = demand_panel(n_series=10, length=58)
+    fold_metrics, series_metrics = backtest(df, 'demand', 'series_id', 'date', n_origins=52,
+                                            horizon=7, step=7, min_train_rows=50,
+                                            model_factory=MeanModel)
+    assert 0 < len(fold_metrics) < 52
+    assert (fold_metrics['train_rows'] >= 50).all()
+    assert np.isfinite(fold_metrics['wape']).all() and (fold_metrics['wape'] < 1).all()
+    assert len(series_metrics) == 10
+
+
+def test_no_usable_origin_raises():
+    df = demand_panel(n_series=10, length=20)
+    with pytest.raises(ValueError, match='complete training rows'):
+        backtest(df, 'demand', 'series_id', 'date', min_train_rows=1000, model_factory=MeanModel)
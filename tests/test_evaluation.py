@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.evaluation import AccuracyReport
+from forecasting.synthetic import demand_panel
+
+
+def test_ids_read_back_from_csv_match_categorical_history(tmp_path):
+    history = demand_panel(n_series=12, length=40)
+    history['series_id'] = history['series_id'].astype(str).astype('category')
+    scored = history[history['date'] >= history['date'].max() - np.timedelta64(6, 'D')].copy()
+    scored['prediction'] = scored['demand'] + 1.0
+    scored.to_csv(tmp_path / 'pred.csv', index=False)
+    from_csv = pd.read_csv(tmp_path / 'pred.csv')
+    assert from_csv['series_id'].dtype.kind == 'i'
+
+    report = AccuracyReport(history, 'demand', 'series_id', 'date', levels=[[]])
+    expected = report.score_frame(scored, 'prediction')
+    got = report.score_frame(from_csv, 'prediction')
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_unknown_series_are_reported():
+    history = demand_panel(n_series=3, length=10)
+    report = AccuracyReport(history, 'demand', 'series_id', 'date')
+    with pytest.raises(ValueError, match='not in the report history'):
+        report.score(pd.Series([7]), history['date'].iloc[:1], [1.0], [1.0])
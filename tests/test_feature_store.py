@@ -0,0 +1,27 @@
+import pandas as pd
+
+from forecasting.feature_store import FeatureStore, cached_features
+from forecasting.pipeline import advanced_feature_engineering
+from forecasting.synthetic import demand_panel
+
+
+def test_hits_and_misses_return_the_same_writable_frame(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    df = demand_panel(n_series=5, length=30)
+    before = df.copy()
+    frames = [cached_features(store, advanced_feature_engineering, df, target_col='demand',
+                              series_col='series_id', date_col='date') for _ in range(2)]
+    pd.testing.assert_frame_equal(df, before)  # the builder works on a copy
+    pd.testing.assert_frame_equal(frames[1], frames[0])
+    for frame in frames:
+        frame.loc[frame.index[0], 'demand_lag_1'] = -1.0
+        frame['demand_ewm'] *= 2
+        assert frame.loc[frame.index[0], 'demand_lag_1'] == -1.0
+
+
+def test_read_only_views_on_request(tmp_path):
+    store = FeatureStore(str(tmp_path))
+    store.put('k', pd.DataFrame({'x': [1.0, 2.0]}))
+    view = store.get('k', writable=False)
+    assert not view['x'].to_numpy().flags.writeable
+    assert store.get('missing') is None
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from forecasting.pipeline import load_and_preprocess
+
+
+@pytest.fixture
+def sales_csv(tmp_path):
+    df = pd.DataFrame({'sku': np.repeat(['A', 'B', 'C'], 4),
+                       'store': np.repeat(['S1', 'S2', 'S2'], 4),
+                       'region': np.repeat(['north', 'south', 'south'], 4),
+                       'date': np.tile(pd.date_range('2024-01-01', periods=4).astype(str), 3),
+                       'demand': [1, np.nan, 3, 4, np.nan, 2, np.nan, 5, 7, 8, 9, np.nan],
+                       'price': np.linspace(1, 2, 12)})
+    path = tmp_path / 'sales.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('id_cols', [(), ('store',), ('store', 'region')])
+def test_text_columns_load_as_categorical_ids(sales_csv, tmp_path, id_cols):
+    for cache_dir in (None, str(tmp_path / 'cache')):
+        df = load_and_preprocess(sales_csv, 'sku', 'date', cache_dir=cache_dir, id_cols=id_cols)
+        for c in ('sku', 'store', 'region'):
+            assert isinstance(df[c].dtype, pd.CategoricalDtype)
+        assert df['demand'].dtype == np.float32 and df['price'].dtype == np.float32
+        assert list(df['store'].astype(str)) == ['S1'] * 4 + ['S2'] * 8
+
+
+def test_forward_fill_stays_inside_each_series(sales_csv):
+    df = load_and_preprocess(sales_csv, 'sku', 'date')
+    expected = [1, 1, 3, 4, np.nan, 2, 2, 5, 7, 8, 9, 9]
+    np.testing.assert_array_equal(df['demand'].to_numpy(), np.float32(expected))
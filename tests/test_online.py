@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from forecasting.artifacts import load_artifact
+from forecasting.cli import main
+from forecasting.features import degree2_terms, term_name
+from forecasting.online import OnlineFeatures, check_parity
+from forecasting.synthetic import demand_panel
+
+
+def panel_with_gaps(seed=0):
+    df = demand_panel(n_series=30, length=60, intermittency=0.2, seed=seed)
+    rng = np.random.default_rng(seed)
+    df.loc[rng.random(len(df)) < 0.05, 'demand'] = np.nan
+    df['price'] = rng.uniform(1, 5, len(df))
+    # series of different lengths, some shorter than the buffer
+    return df[~((df['series_id'] % 7 == 0) & (df['date'] >= df['date'].min() + np.timedelta64(3, 'D')))]
+
+
+def feature_names(lags=3):
+    base = [f'demand_lag_{k}' for k in range(1, lags + 1)] + ['demand_rolling_mean', 'demand_ewm']
+    return base + [term_name(t) for t in degree2_terms(base)] + ['price']
+
+
+@pytest.mark.parametrize('lags,rolling_window', [(3, 3), (2, 5), (7, 2)])
+def test_online_matches_batch_features(lags, rolling_window):
+    checked = check_parity(panel_with_gaps(), 'demand', 'series_id', 'date', feature_names(lags),
+                           lags=lags, rolling_window=rolling_window, ewm_alpha=0.3)
+    assert checked > 0
+
+
+def test_parity_without_seeding_history():
+    assert check_parity(panel_with_gaps(1), 'demand', 'series_id', 'date', feature_names(),
+                        ewm_alpha=0.3, history=0.0) > 0
+
+
+def test_save_and_load_resume_the_same_state(tmp_path):
+    df = panel_with_gaps(2)
+    names = feature_names()
+    state = OnlineFeatures('demand', names, ewm_alpha=0.3, capacity=4).seed(df, 'series_id', 'date')
+    path = str(tmp_path / 'state.npz')
+    state.save(path)
+    restored = OnlineFeatures.load(path)
+    for series in (1, 2, 29, 'new'):
+        np.testing.assert_array_equal(restored.update(series, 12.0, {'price': 2.5}),
+                                      state.update(series, 12.0, {'price': 2.5}))
+
+
+def test_cli_artifact_records_the_feature_params(tmp_path):
+    path, features, artifact = (str(tmp_path / name) for name in ('raw.parquet', 'f.parquet', 'model'))
+    panel_with_gaps(3).to_parquet(path)
+    main(['features', path, '--out', features, '--target', 'demand', '--series-col', 'series_id',
+          '--date-col', 'date', '--lags', '5', '--rolling-window', '4', '--advanced'])
+    main(['train', features, '--target', 'demand', '--artifact', artifact, '--drop', 'series_id',
+          '--date-col', 'date', '--rolling-window', '4'])
+    state = OnlineFeatures.from_artifact(load_artifact(artifact))
+    assert (state.lags, state.rolling_window, state.ewm_alpha) == (5, 4, 0.3)
+    assert [name for _, name in state.extra_cols] == ['price']
+
+
+def test_from_artifact_infers_lags_of_older_bundles():
+    names = feature_names(lags=6)
+    artifact = SimpleNamespace(feature_names=names, feature_params={
+        'target_col': 'demand', 'rolling_window': 3, 'ewm_alpha': 0.3})
+    assert OnlineFeatures.from_artifact(artifact).lags == 6
+
+
+@pytest.mark.parametrize('params', [{'lags': 3, 'ewm_alpha': 0.3},
+                                    {'lags': 2, 'rolling_window': 3, 'ewm_alpha': 0.3}])
+def test_from_artifact_rejects_features_it_cannot_build(params):
+    artifact = SimpleNamespace(feature_names=feature_names(lags=3),
+                               feature_params={'target_col': 'demand', **params})
+    with pytest.raises(ValueError, match='demand_'):
+        OnlineFeatures.from_artifact(artifact)
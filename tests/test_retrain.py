@@ -0,0 +1,27 @@
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from forecasting.artifacts import load_artifact, save_artifact
+from forecasting.backtest import default_model
+from forecasting.features import grouped_feature_engineering
+from forecasting.retrain import retrain
+from forecasting.synthetic import demand_panel
+
+
+def test_warm_updates_stop_at_max_trees(tmp_path):
+    df = grouped_feature_engineering(demand_panel(n_series=10, length=120), 'demand',
+                                     'series_id', 'date', ewm_alpha=0.3)
+    features = [c for c in df.columns if c.startswith('demand_')]
+    X = df[features].to_numpy()
+    scaler = StandardScaler().fit(X)
+    model = default_model(1).fit(scaler.transform(X), df['demand'].to_numpy())
+    path = str(tmp_path / 'model')
+    save_artifact(path, model, scaler, features, {'target_col': 'demand'}, {'mae': 1.0})
+
+    # a huge threshold never reports drift, so only the tree limit forces a refit
+    kwargs = dict(n_rounds=20, threshold=np.inf, max_trees=130, n_jobs=1)
+    warm = retrain(path, df, 'demand', 'date', **kwargs)
+    assert (warm['mode'], warm['reason'], warm['trees']) == ('warm', None, 120)
+    full = retrain(path, df, 'demand', 'date', **kwargs)
+    assert (full['mode'], full['reason'], full['trees']) == ('full', 'max_trees', 100)
+    assert load_artifact(path).metrics['refit_reason'] == 'max_trees'
@@ -0,0 +1,26 @@
+import numpy as np
+from sklearn.metrics import mean_absolute_error
+
+from forecasting.artifacts import ArtifactRegistry
+from forecasting.pipeline import feature_engineering
+from forecasting.segments import train_segments
+from forecasting.synthetic import demand_panel
+
+
+def test_stored_metrics_match_the_reloaded_bundle(tmp_path):
+    df = feature_engineering(demand_panel(n_series=6, length=60), 'demand',
+                             series_col='series_id', date_col='date')
+    df['segment'] = df['series_id'].astype(str)
+    features = ['demand_lag_1', 'demand_lag_2', 'demand_lag_3', 'demand_rolling_mean']
+    root = str(tmp_path / 'segments')
+    train_segments(df, 'demand', ['segment'], 'date', root, feature_cols=features, n_workers=1)
+
+    registry = ArtifactRegistry(root)
+    assert len(registry.segments()) == 6
+    for name, rows in df.groupby('segment'):
+        rows = rows.sort_values('date')
+        holdout = rows.iloc[len(rows) - int(round(len(rows) * 0.2)):]
+        artifact = registry.get(name)
+        assert artifact.manifest['input_dtype'] == 'float32'
+        pred = artifact.predict(holdout[features].to_numpy())
+        assert artifact.metrics['mae'] == mean_absolute_error(holdout['demand'].to_numpy(np.float64), pred)
@@ -0,0 +1,79 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+
+from forecasting.artifacts import load_artifact, save_artifact
+from forecasting.serving import make_server
+
+
+@pytest.fixture(scope='module')
+def artifact(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 4))
+    y = X @ np.array([1.0, -2.0, 0.5, 3.0]) + rng.normal(size=500)
+    scaler = StandardScaler().fit(X)
+    model = XGBRegressor(n_estimators=10, max_depth=3).fit(scaler.transform(X), y)
+    path = str(tmp_path_factory.mktemp('artifact') / 'model')
+    save_artifact(path, model, scaler, ['a', 'b', 'c', 'd'])
+    return load_artifact(path)
+
+
+@pytest.fixture
+def server(artifact):
+    # a long wait window so concurrent requests land in the same batch
+    server = make_server(artifact.model, artifact.scaler, port=0, max_wait_ms=200)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.batcher.close()
+    server.server_close()
+
+
+def post(url, payload):
+    request = urllib.request.Request(f'{url}/predict', data=json.dumps(payload).encode())
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_predictions_match_artifact(artifact, server):
+    X = np.random.default_rng(1).normal(size=(5, 4))
+    status, body = post(server, {'instances': X.tolist()})
+    assert status == 200
+    np.testing.assert_array_equal(np.float32(body['predictions']), artifact.predict(X))
+
+
+def test_malformed_request_fails_alone(artifact, server):
+    good = np.random.default_rng(2).normal(size=(3, 4))
+    with ThreadPoolExecutor(2) as pool:
+        ok = pool.submit(post, server, {'instances': good.tolist()})
+        bad = pool.submit(post, server, {'instances': [[1.0, 2.0]]})
+        (ok_status, ok_body), (bad_status, bad_body) = ok.result(), bad.result()
+    assert ok_status == 200
+    np.testing.assert_array_equal(np.float32(ok_body['predictions']), artifact.predict(good))
+    assert bad_status == 400
+    assert '4 features' in bad_body['error']
+
+
+def test_bad_payload_is_rejected(server):
+    assert post(server, {'rows': [[1.0, 2.0, 3.0, 4.0]]})[0] == 400
+    assert post(server, {'instances': [[1.0, 2.0], [3.0]]})[0] == 400
+
+
+def test_health_and_metrics(server):
+    post(server, {'instances': [[0.0, 0.0, 0.0, 0.0]]})
+    with urllib.request.urlopen(f'{server}/health') as response:
+        assert json.loads(response.read()) == {'status': 'ok'}
+    with urllib.request.urlopen(f'{server}/metrics') as response:
+        metrics = json.loads(response.read())
+    assert metrics['requests'] == 1 and metrics['rows'] == 1
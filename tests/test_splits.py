@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from forecasting import quantile
+from forecasting.matrix_store import FeatureMatrix, write_matrix
+from forecasting.pipeline import _split_and_scale, advanced_feature_engineering
+from forecasting.synthetic import demand_panel
+
+
+@pytest.fixture
+def panel():
+    # sorted by (series, date), as the panel feature builders return it
+    df = advanced_feature_engineering(demand_panel(n_series=20, length=100), 'demand',
+                                      series_col='series_id', date_col='date', poly_terms=None)
+    df['day'] = (df['date'] - df['date'].min()).dt.days.astype(np.float32)
+    return df.drop(columns=['series_id'])
+
+
+def test_frame_split_holds_out_the_latest_dates_of_every_series(panel):
+    _, _, y_train, y_test, _ = _split_and_scale(panel, 'demand', date_col='date')
+    assert panel.loc[y_train.index, 'date'].max() < panel.loc[y_test.index, 'date'].min()
+    assert len(y_test) == 20 * 19  # 19 of the 97 dates, every series
+
+
+@pytest.mark.parametrize('parquet', [False, True])
+def test_matrix_split_holds_out_the_latest_dates(panel, tmp_path, parquet):
+    source = panel
+    if parquet:
+        source = str(tmp_path / 'features.parquet')
+        panel.to_parquet(source, row_group_size=500)
+    write_matrix(source, 'demand', str(tmp_path / 'store'), date_col='date', chunk_rows=300)
+    matrix = FeatureMatrix(str(tmp_path / 'store'))
+    assert 'date' not in matrix.feature_names
+    X_train, X_test, y_train, y_test = matrix.split(test_size=0.2)
+    train_dates, test_dates = matrix.dates[:len(X_train)], matrix.dates[len(X_train):]
+    assert train_dates.max() < test_dates.min()
+    # rows moved into date order intact
+    day = matrix.feature_names.index('day')
+    expected = panel.sort_values('date', kind='stable')
+    np.testing.assert_array_equal(matrix.X[:, day], expected['day'].to_numpy(np.float32))
+    np.testing.assert_array_equal(matrix.y, expected['demand'].to_numpy(np.float64))
+
+
+def test_quantile_split_holds_out_the_latest_dates(panel, monkeypatch):
+    seen = {}
+
+    class Model:
+        quantiles = (0.1, 0.9)
+
+        def predict(self, X):
+            seen['test'] = X
+            return np.zeros((len(X), 2))
+
+    def fake_train(X_train, y_train, quantiles):
+        seen['train'] = X_train
+        return Model()
+
+    monkeypatch.setattr(quantile, 'train_quantiles', fake_train)
+    quantile.train_model_quantiles(panel, 'demand', quantiles=(0.1, 0.9), date_col='date')
+    day = list(panel.drop(columns=['demand', 'date']).columns).index('day')
+    assert seen['train'][:, day].max() < seen['test'][:, day].min()